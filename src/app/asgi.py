@@ -0,0 +1,236 @@
+"""ASGI entry point backed by AsyncRustService.
+
+Serves /debug/, /check/, /testing/, /metrics and /health/* like
+app.main:app, with every compilation and run awaited on one event
+loop. Any ASGI server can run app.asgi:app; without one, the minimal
+HTTP/1.1 server below does: python -m app.asgi --bind 0.0.0.0:9009
+"""
+import json
+import time
+import asyncio
+import argparse
+from http import HTTPStatus
+from urllib.parse import unquote
+from typing import List, Tuple
+
+from marshmallow import ValidationError
+from app import config, metrics
+from app.schema import CheckSchema, DebugSchema, TestsSchema
+from app.service.aio import AsyncRustService
+from app.service.exceptions import ServiceException, OverloadedException
+from app.service.warmup import warm_up
+
+
+Headers = List[Tuple[bytes, bytes]]
+
+ROUTES = {
+    '/debug/': (DebugSchema, 'debug'),
+    '/check/': (CheckSchema, 'check'),
+    '/testing/': (TestsSchema, 'testing'),
+}
+
+
+def _json(status: int, payload: dict, headers: Headers = ()) -> Tuple[int, Headers, bytes]:
+    return (
+        status,
+        [(b'content-type', b'application/json'), *headers],
+        json.dumps(payload).encode(),
+    )
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def _handle(scope, receive) -> Tuple[int, Headers, bytes]:
+    path, method = scope['path'], scope['method']
+    if path == '/health/live' and method == 'GET':
+        return _json(200, {'status': 'ok'})
+    if path == '/health/ready' and method == 'GET':
+        return _json(200 if warm_up.ready else 503, warm_up.status())
+    if path == '/metrics' and method == 'GET':
+        return (
+            200,
+            [(b'content-type', b'text/plain; version=0.0.4')],
+            metrics.REGISTRY.collect().encode(),
+        )
+    if path not in ROUTES:
+        return _json(404, {'error': HTTPStatus.NOT_FOUND.phrase, 'details': None})
+    if method != 'POST':
+        return _json(405, {'error': HTTPStatus.METHOD_NOT_ALLOWED.phrase, 'details': None})
+
+    schema_class, handler = ROUTES[path]
+    schema = schema_class()
+    try:
+        payload = json.loads(await _read_body(receive) or b'null')
+    except ValueError as ex:
+        return _json(400, {'error': HTTPStatus.BAD_REQUEST.phrase, 'details': str(ex)})
+    try:
+        data = await getattr(AsyncRustService, handler)(schema.load(payload))
+    except ValidationError as ex:
+        return _json(400, {'error': 'Validation error', 'details': ex.messages})
+    except OverloadedException as ex:
+        return _json(
+            503,
+            {'error': ex.message, 'details': ex.details},
+            headers=[(b'retry-after', str(config.RETRY_AFTER).encode())],
+        )
+    except ServiceException as ex:
+        return _json(500, {'error': ex.message, 'details': ex.details})
+    except Exception as ex:
+        return _json(500, {'error': str(ex), 'details': 'Internal Server Error'})
+    return _json(200, schema.dump(data))
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            warm_up.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    start = time.perf_counter()
+    warm_up.start()  # for servers without lifespan events
+    status, headers, body = await _handle(scope, receive)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+    metrics.REQUEST_DURATION.observe(
+        time.perf_counter() - start,
+        endpoint=scope['path'] if scope['path'] in ROUTES else 'unknown',
+    )
+    metrics.REGISTRY.flush(force=True)
+
+
+# Minimal HTTP/1.1 server: Content-Length bodies, keep-alive, one
+# buffered response per request. Enough behind a reverse proxy.
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, target, version = request_line.decode('latin-1').split()
+    headers = []
+    while (line := await reader.readline()).strip():
+        name, _, value = line.decode('latin-1').partition(':')
+        headers.append((name.strip().lower().encode(), value.strip().encode()))
+    return method, target, version, headers
+
+
+def _format_response(status: int, headers: Headers, body: bytes, keep_alive: bool) -> bytes:
+    lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}']
+    lines += [f'{name.decode()}: {value.decode()}' for name, value in headers]
+    lines.append(f'content-length: {len(body)}')
+    lines.append(f"connection: {'keep-alive' if keep_alive else 'close'}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def _serve_connection(application, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ValueError:
+                writer.write(_format_response(400, [], b'', keep_alive=False))
+                break
+            if request is None:
+                break
+            method, target, version, headers = request
+            fields = dict(headers)
+            if b'transfer-encoding' in fields:
+                writer.write(_format_response(411, [], b'', keep_alive=False))
+                break
+            body = await reader.readexactly(int(fields.get(b'content-length', 0)))
+            keep_alive = (
+                version == 'HTTP/1.1'
+                and fields.get(b'connection', b'').lower() != b'close'
+            )
+
+            path, _, query = target.partition('?')
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': version.partition('/')[2],
+                'method': method.upper(),
+                'scheme': 'http',
+                'path': unquote(path),
+                'raw_path': path.encode(),
+                'query_string': query.encode(),
+                'root_path': '',
+                'headers': headers,
+                'client': writer.get_extra_info('peername'),
+                'server': writer.get_extra_info('sockname'),
+            }
+            pending = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            response = {'status': 500, 'headers': [], 'body': []}
+
+            async def receive():
+                if pending:
+                    return pending.pop()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    response['status'] = message['status']
+                    response['headers'] = message.get('headers', [])
+                elif message['type'] == 'http.response.body':
+                    response['body'].append(message.get('body', b''))
+
+            await application(scope, receive, send)
+            writer.write(_format_response(
+                response['status'],
+                response['headers'],
+                b''.join(response['body']),
+                keep_alive=keep_alive,
+            ))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_server(application, host: str, port: int):
+    return asyncio.start_server(
+        lambda reader, writer: _serve_connection(application, reader, writer),
+        host,
+        port,
+    )
+
+
+async def serve(application, host: str, port: int):
+    server = await start_server(application, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve app.asgi:app without an ASGI server')
+    parser.add_argument('--bind', default='0.0.0.0:9009', help='host:port')
+    args = parser.parse_args()
+    host, _, port = args.bind.rpartition(':')
+    asyncio.run(serve(app, host, int(port)))
+
+
+if __name__ == '__main__':
+    main()
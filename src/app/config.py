@@ -3,6 +3,73 @@ from os import environ as env
 from tempfile import gettempdir
 
 
-TIMEOUT = 5  # seconds
+TIMEOUT = int(env.get('TIMEOUT', 5))  # seconds, wall-clock limit of one program run
+CPU_TIMEOUT = int(env.get('CPU_TIMEOUT', TIMEOUT))  # seconds, CPU time of one program run
+COMPILE_TIMEOUT = int(env.get('COMPILE_TIMEOUT', 10))  # seconds
+REQUEST_TIMEOUT = int(env.get('REQUEST_TIMEOUT', 60))  # seconds, budget of the whole request
+MAX_TIMEOUT = int(env.get('MAX_TIMEOUT', 10))  # maxima of the per request limits
+MAX_CPU_TIMEOUT = int(env.get('MAX_CPU_TIMEOUT', 10))
+MAX_REQUEST_TIMEOUT = int(env.get('MAX_REQUEST_TIMEOUT', 120))
+OUTPUT_LIMIT = int(env.get('OUTPUT_LIMIT', 1024 * 1024))  # bytes per stream
 SANDBOX_USER_UID = int(env.get('SANDBOX_USER_UID', os.getuid()))
 SANDBOX_DIR = env.get('SANDBOX_DIR', gettempdir())
+
+RUNNER_ENABLED = env.get('RUNNER_ENABLED', '1') == '1'  # 0 spawns programs from the web worker
+RUNNER_SOCKET = env.get('RUNNER_SOCKET', os.path.join(SANDBOX_DIR, 'runner.sock'))
+RUNNER_IDLE_TIMEOUT = int(env.get('RUNNER_IDLE_TIMEOUT', 600))  # seconds
+
+ARTIFACT_CACHE_ENABLED = env.get('ARTIFACT_CACHE_ENABLED', '1') == '1'
+ARTIFACT_CACHE_DIR = env.get(
+    'ARTIFACT_CACHE_DIR',
+    os.path.join(SANDBOX_DIR, 'artifacts')
+)
+ARTIFACT_CACHE_SIZE = int(env.get('ARTIFACT_CACHE_SIZE', 512 * 1024 * 1024))  # bytes
+SHARED_CACHE_DIR = env.get('SHARED_CACHE_DIR', '')  # second tier on a shared volume, empty disables
+SHARED_CACHE_SIZE = int(env.get('SHARED_CACHE_SIZE', 4 * 1024 * 1024 * 1024))  # bytes
+SHARED_CACHE_GC_INTERVAL = int(env.get('SHARED_CACHE_GC_INTERVAL', 60))  # seconds
+
+COMPILE_BACKEND = env.get('COMPILE_BACKEND', 'rustc')  # rustc | cargo
+CRATES_DIR = env.get('CRATES_DIR', '/opt/crates')  # prebuilt crates, see app.service.crates
+DEBUG_PROFILE = env.get('DEBUG_PROFILE', 'release')  # release | fast-compile | fast-run
+TESTING_PROFILE = env.get('TESTING_PROFILE', 'release')
+
+PROJECT_POOL_SIZE = int(env.get('PROJECT_POOL_SIZE', 4))  # 0 disables the pool
+
+WARMUP_ENABLED = env.get('WARMUP_ENABLED', '1') == '1'  # canary build before /health/ready
+WARMUP_RETRY_INTERVAL = int(env.get('WARMUP_RETRY_INTERVAL', 10))  # seconds
+
+CPU_COUNT = len(os.sched_getaffinity(0))
+TEST_WORKERS = int(env.get('TEST_WORKERS', CPU_COUNT))  # tests of one submission run concurrently
+
+CHECKER_CACHE_SIZE = int(env.get('CHECKER_CACHE_SIZE', 128))
+
+RESULT_CACHE_ENABLED = env.get('RESULT_CACHE_ENABLED', '0') == '1'  # memoize program runs
+RESULT_CACHE_SIZE = int(env.get('RESULT_CACHE_SIZE', 64 * 1024 * 1024))  # bytes per worker
+
+JOB_WORKERS = int(env.get('JOB_WORKERS', 2))
+JOB_DIR = env.get('JOB_DIR', os.path.join(SANDBOX_DIR, 'jobs'))
+JOB_RETENTION = int(env.get('JOB_RETENTION', 600))  # seconds
+JOB_MAX_JOBS = int(env.get('JOB_MAX_JOBS', 1000))
+
+SCHEDULER_DIR = env.get('SCHEDULER_DIR', os.path.join(SANDBOX_DIR, 'slots'))
+COMPILE_SLOTS = int(env.get('COMPILE_SLOTS', CPU_COUNT))  # 0 disables the limit
+EXEC_SLOTS = int(env.get('EXEC_SLOTS', CPU_COUNT))  # 0 disables the limit
+SCHEDULER_QUEUE_SIZE = int(env.get('SCHEDULER_QUEUE_SIZE', 4 * CPU_COUNT))
+SCHEDULER_WAIT_TIMEOUT = int(env.get('SCHEDULER_WAIT_TIMEOUT', 60))  # seconds
+RETRY_AFTER = int(env.get('RETRY_AFTER', 5))  # seconds
+
+METRICS_DIR = env.get('METRICS_DIR', os.path.join(SANDBOX_DIR, 'metrics'))
+METRICS_FLUSH_INTERVAL = float(env.get('METRICS_FLUSH_INTERVAL', 1))  # seconds
+
+GUNICORN_BIND = env.get('GUNICORN_BIND', '0.0.0.0:9009')
+GUNICORN_WORKERS = int(env.get('GUNICORN_WORKERS', 0))  # 0 sizes from CPU_COUNT, see app.gunicorn_conf
+GUNICORN_THREADS = int(env.get('GUNICORN_THREADS', 0))  # per worker, 0 sizes from the scheduler slots
+GUNICORN_KEEPALIVE = int(env.get('GUNICORN_KEEPALIVE', 5))  # seconds
+GUNICORN_MAX_REQUESTS = int(env.get('GUNICORN_MAX_REQUESTS', 1000))  # worker restart, 0 disables
+GUNICORN_MAX_REQUESTS_JITTER = int(env.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+ROUTER_BACKENDS = [url for url in env.get('ROUTER_BACKENDS', '').split(',') if url]  # see app.router
+ROUTER_REPLICAS = int(env.get('ROUTER_REPLICAS', 100))  # ring points per instance
+ROUTER_HEALTH_INTERVAL = float(env.get('ROUTER_HEALTH_INTERVAL', 2))  # seconds
+ROUTER_CONNECT_TIMEOUT = float(env.get('ROUTER_CONNECT_TIMEOUT', 1))  # seconds, failover after
+ROUTER_TIMEOUT = float(env.get('ROUTER_TIMEOUT', 200))  # seconds, response of an instance
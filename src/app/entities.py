@@ -1,5 +1,14 @@
-from typing import Optional, List
-from dataclasses import dataclass
+import time
+from typing import Optional, List, Any, Union
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Limits:
+
+    timeout: Optional[float] = None
+    cpu_timeout: Optional[int] = None
+    request_timeout: Optional[float] = None
 
 
 @dataclass
@@ -9,6 +18,23 @@ class DebugData:
     code: Optional[str] = None
     result: Optional[str] = None
     error: Optional[str] = None
+    stats: bool = False
+    check_only: bool = False
+    profile: Optional[str] = None
+    no_cache: bool = False
+    limits: Optional[Limits] = None
+    wall_time: Optional[float] = None
+    cpu_time: Optional[float] = None
+    max_rss: Optional[int] = None
+
+
+@dataclass
+class CheckData:
+
+    code: Optional[str] = None
+    ok: Optional[bool] = None
+    error: Optional[str] = None
+    details: Optional[str] = None
 
 
 @dataclass
@@ -21,6 +47,9 @@ class TestData:
     result: Optional[str] = None
     error: Optional[str] = None
     ok: Optional[bool] = None
+    wall_time: Optional[float] = None
+    cpu_time: Optional[float] = None
+    max_rss: Optional[int] = None
 
 
 @dataclass
@@ -34,3 +63,25 @@ class TestsData:
     ok: Optional[bool] = None
     code: Optional[str] = None
     checker: Optional[str] = None
+    comparator: Optional[str] = None
+    stats: bool = False
+    check_only: bool = False
+    profile: Optional[str] = None
+    no_cache: bool = False
+    limits: Optional[Limits] = None
+    wall_time: Optional[float] = None
+    cpu_time: Optional[float] = None
+    max_rss: Optional[int] = None
+
+
+@dataclass
+class Job:
+
+    type: str
+    data: Union[DebugData, TestsData]
+    id: Optional[str] = None
+    status: str = 'queued'  # queued | running | done | failed
+    error: Optional[str] = None
+    details: Optional[Any] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
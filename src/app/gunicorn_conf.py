@@ -0,0 +1,82 @@
+"""gunicorn settings: gunicorn -c python:app.gunicorn_conf app.main:app
+
+A request spends most of its time waiting for the compiler and the
+program, both child processes, so each worker serves several requests
+on threads. The scheduler admits at most COMPILE_SLOTS +
+SCHEDULER_QUEUE_SIZE requests per host and answers the rest with 503,
+handlers beyond that would only hold connections bound to be rejected.
+"""
+import math
+from typing import Tuple
+
+# Not `config`: every module level name is read as a gunicorn setting
+from app import config as settings
+
+
+SPARE_THREADS = 2  # /metrics, /jobs/ polls and rejections do not take a slot
+RESPONSE_GRACE = 10  # seconds
+
+
+def admitted_requests() -> int:
+    if settings.COMPILE_SLOTS <= 0:
+        return settings.CPU_COUNT + settings.SCHEDULER_QUEUE_SIZE
+    return settings.COMPILE_SLOTS + settings.SCHEDULER_QUEUE_SIZE
+
+
+def size(cpu_count: int, concurrency: int) -> Tuple[int, int]:
+    """(workers, threads per worker) serving `concurrency` requests.
+
+    Processes are for the Python side of a request (JSON, checkers) and
+    are capped by the cores; threads cover the waiting.
+    """
+    workers = settings.GUNICORN_WORKERS or max(2, min(cpu_count + 1, concurrency))
+    threads = settings.GUNICORN_THREADS or max(1, math.ceil(concurrency / workers))
+    return workers, threads
+
+
+def request_budget() -> int:
+    """Longest a request may legitimately take: slot waits, compilation
+    and the largest run budget a client may ask for."""
+    return (
+        settings.SCHEDULER_WAIT_TIMEOUT
+        + settings.COMPILE_TIMEOUT
+        + settings.MAX_REQUEST_TIMEOUT
+        + RESPONSE_GRACE
+    )
+
+
+bind = settings.GUNICORN_BIND
+workers, threads = size(settings.CPU_COUNT, admitted_requests() + SPARE_THREADS)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Modules and the toolchain probe are loaded once in the master and
+# shared copy-on-write; per process state (project pool, job threads,
+# metrics files) starts lazily after the fork
+preload_app = True
+timeout = request_budget()
+graceful_timeout = request_budget()
+keepalive = settings.GUNICORN_KEEPALIVE
+
+# Workers are recycled to bound memory growth of the in-process caches,
+# jitter keeps them from restarting all at once
+max_requests = settings.GUNICORN_MAX_REQUESTS
+max_requests_jitter = settings.GUNICORN_MAX_REQUESTS_JITTER
+
+# Heartbeat files on tmpfs, a slow disk must not get workers killed
+worker_tmp_dir = '/dev/shm'
+
+
+def when_ready(server):
+    from app.service import crates
+    from app.service.cache import toolchain_version
+
+    # Memoized per process, warmed here so workers inherit the results
+    toolchain_version()
+    crates.load_index()
+
+
+def post_worker_init(worker):
+    from app.service.warmup import warm_up
+
+    # Workers warm up at boot instead of on the first request
+    warm_up.start()
@@ -1,22 +1,97 @@
+import json
+import time
+import queue
+import threading
 from flask import (
     Flask,
+    Response,
+    g,
     request,
     render_template,
     jsonify,
     make_response
 )
 from marshmallow import ValidationError
+from app import config, messages, metrics
 from app.service.main import RustService
+from app.service.jobs import JobQueue
+from app.service.warmup import warm_up
+from app.entities import TestsData
 from app.schema import (
+    CheckSchema,
     DebugSchema,
+    TestSchema,
     TestsSchema,
+    JobSchema,
     ServiceExceptionSchema
 )
-from app.service.exceptions import ServiceException
+from app.service.exceptions import ServiceException, OverloadedException
+
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+SSE_MIMETYPE = 'text/event-stream'
+
+
+def _format_event(event: str, payload: dict, mimetype: str) -> str:
+    if mimetype == SSE_MIMETYPE:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({'event': event, **payload}) + "\n"
+
+
+def stream_testing(data: TestsData, mimetype: str) -> Response:
+    events: queue.Queue = queue.Queue()
+    test_schema = TestSchema()
+
+    def run():
+        try:
+            RustService.testing(
+                data,
+                on_compile=lambda error: events.put(('compile', {'error': error})),
+                on_test=lambda index, test: events.put(
+                    ('test', {'index': index, **test_schema.dump(test)})
+                ),
+            )
+        except ServiceException as ex:
+            events.put(('error', {'error': ex.message, 'details': ex.details}))
+        except Exception as ex:
+            events.put(('error', {'error': str(ex), 'details': 'Internal Server Error'}))
+        else:
+            events.put(('summary', TestsSchema(exclude=('tests',)).dump(data)))
+        events.put(None)
+
+    def generate():
+        while (item := events.get()) is not None:
+            yield _format_event(*item, mimetype=mimetype)
+
+    threading.Thread(target=run, daemon=True).start()
+    return Response(generate(), mimetype=mimetype)
 
 
 def create_app():
     app = Flask(__name__)
+    jobs = JobQueue(dump=JobSchema().dump)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.before_request
+    def start_warm_up():
+        # Also started by gunicorn after a worker boots, see app.gunicorn_conf
+        warm_up.start()
+
+    @app.after_request
+    def observe_request(response):
+        if 'request_start' in g:
+            metrics.REQUEST_DURATION.observe(
+                time.perf_counter() - g.request_start,
+                endpoint=request.url_rule.rule if request.url_rule else 'unknown',
+            )
+        return response
+
+    @app.teardown_request
+    def flush_metrics(ex=None):
+        metrics.REGISTRY.flush(force=True)
 
     @app.errorhandler(ValidationError)
     def validation_error_handler(ex: ValidationError):
@@ -26,6 +101,12 @@ def create_app():
     def service_exception_handler(ex: ServiceException):
         return jsonify({'error': ex.message, 'details': ex.details}), 500
 
+    @app.errorhandler(OverloadedException)
+    def overloaded_exception_handler(ex: OverloadedException):
+        response = jsonify({'error': ex.message, 'details': ex.details})
+        response.headers['Retry-After'] = str(config.RETRY_AFTER)
+        return response, 503
+
     @app.errorhandler(Exception)
     def handle_all_exceptions(ex):
         return jsonify({'error': str(ex), 'details': 'Internal Server Error'}), 500
@@ -39,7 +120,19 @@ def create_app():
         schema = DebugSchema()
         try:
             data = RustService.debug(schema.load(request.get_json()))
-        except ValidationError as ex:
+        except (ValidationError, OverloadedException) as ex:
+            raise ex
+        except ServiceException as ex:
+            return make_response(jsonify({'error': ex.message, 'details': ex.details}), 500)
+        else:
+            return schema.dump(data)
+
+    @app.route('/check/', methods=['post'])
+    def check():
+        schema = CheckSchema()
+        try:
+            data = RustService.check(schema.load(request.get_json()))
+        except (ValidationError, OverloadedException) as ex:
             raise ex
         except ServiceException as ex:
             return make_response(jsonify({'error': ex.message, 'details': ex.details}), 500)
@@ -49,15 +142,51 @@ def create_app():
     @app.route('/testing/', methods=['post'])
     def testing():
         schema = TestsSchema()
+        mimetype = request.accept_mimetypes.best_match(
+            ['application/json', NDJSON_MIMETYPE, SSE_MIMETYPE],
+            default='application/json'
+        )
+        if mimetype in (NDJSON_MIMETYPE, SSE_MIMETYPE):
+            return stream_testing(schema.load(request.get_json()), mimetype)
         try:
             data = RustService.testing(schema.load(request.get_json()))
-        except ValidationError as ex:
+        except (ValidationError, OverloadedException) as ex:
             raise ex
         except ServiceException as ex:
             return make_response(jsonify({'error': ex.message, 'details': ex.details}), 500)
         else:
             return schema.dump(data)
 
+    @app.route('/health/live', methods=['get'])
+    def health_live():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/health/ready', methods=['get'])
+    def health_ready():
+        status = warm_up.status()
+        return jsonify(status), 200 if warm_up.ready else 503
+
+    @app.route('/metrics', methods=['get'])
+    def metrics_view():
+        return Response(
+            metrics.REGISTRY.collect(),
+            mimetype='text/plain; version=0.0.4'
+        )
+
+    @app.route('/jobs/', methods=['post'])
+    def create_job():
+        schema = JobSchema()
+        data = schema.load(request.get_json())
+        job = jobs.submit(job_type=data['type'], data=data['data'])
+        return schema.dump(job), 202
+
+    @app.route('/jobs/<job_id>/', methods=['get'], strict_slashes=False)
+    def get_job(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': messages.MSG_10, 'details': None}), 404
+        return job
+
     return app
 
 app = create_app()
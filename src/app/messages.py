@@ -9,6 +9,17 @@ MSG_5 = 'Invalid checker call. See details'
 MSG_6 = 'Unexpected error during code execution. See details'
 MSG_7 = 'Compilation error. See details'
 MSG_8 = 'You need to specify the console input'
+MSG_9 = (
+    'Unknown comparator. Expected one of: '
+    'exact, tokens, lines-unordered, float[:<tolerance>]'
+)
+MSG_10 = 'Job not found'
+MSG_11 = 'Service is overloaded, try again later'
+MSG_12 = 'Program output size limit exceeded, output truncated'
+MSG_13 = 'Program CPU time limit exceeded'
+MSG_14 = 'Request time limit exceeded'
+MSG_15 = 'No sandbox instance available, try again later'
+MSG_16 = 'Sandbox instance did not respond in time'
 MSG_RUST_PANIC = 'Program panicked during execution'
 MSG_RUST_COMPILE_ERROR = 'Compilation error. See details'
-MSG_RUST_COMPILE_TIMEOUT = MSG_1
\ No newline at end of file
+MSG_RUST_COMPILE_TIMEOUT = MSG_1
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+from app import config
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ARCHIVE = 'archive.json'
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    return ','.join(f'{name}="{value}"' for name, value in sorted(labels.items()))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+
+    """Process-local metric values, merged across processes on collect().
+
+    Every gunicorn worker periodically writes its values to
+    METRICS_DIR/<pid>.json; collect() sums the files of all workers and
+    folds files of dead workers into a single archive so counters stay
+    monotonic across worker restarts.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, 'Metric'] = {}
+        self._values: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flushed = 0.0
+
+    def register(self, metric: 'Metric'):
+        self.metrics[metric.name] = metric
+
+    def update(self, name: str, labels: str, fn: Callable[[Any], Any]):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Values inherited from the parent were flushed by the parent
+                self._values, self._pid, self._flushed = {}, os.getpid(), 0.0
+            values = self._values.setdefault(name, {})
+            values[labels] = fn(values.get(labels))
+        self.flush()
+
+    def flush(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._flushed < config.METRICS_FLUSH_INTERVAL:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._flushed = now
+            data = json.dumps(self._values)
+        os.makedirs(config.METRICS_DIR, exist_ok=True)
+        path = os.path.join(config.METRICS_DIR, f"{self._pid}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def _merge(self, total: Dict[str, Dict[str, Any]], values: Dict[str, Dict[str, Any]]):
+        for name, series in values.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            merged = total.setdefault(name, {})
+            for labels, value in series.items():
+                merged[labels] = metric.merge(merged.get(labels), value)
+
+    def _load(self, path: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def collect(self) -> str:
+        self.flush(force=True)
+        os.makedirs(config.METRICS_DIR, exist_ok=True)
+        lock_fd = os.open(
+            os.path.join(config.METRICS_DIR, '.lock'),
+            os.O_RDWR | os.O_CREAT,
+            0o600
+        )
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            archive_path = os.path.join(config.METRICS_DIR, ARCHIVE)
+            archive = self._load(archive_path)
+            total: Dict[str, Dict[str, Any]] = {}
+            self._merge(total, archive)
+            dead: List[str] = []
+            for entry in os.scandir(config.METRICS_DIR):
+                pid = entry.name[:-len('.json')]
+                if not entry.name.endswith('.json') or not pid.isdigit():
+                    continue
+                values = self._load(entry.path)
+                self._merge(total, values)
+                if not _pid_alive(int(pid)):
+                    self._merge(archive, values)
+                    dead.append(entry.path)
+            if dead:
+                tmp_path = f"{archive_path}.tmp"
+                with open(tmp_path, 'w') as file:
+                    json.dump(archive, file)
+                os.replace(tmp_path, archive_path)
+                for path in dead:
+                    os.remove(path)
+        finally:
+            os.close(lock_fd)
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, value in sorted(total.get(name, {}).items()):
+                lines.extend(metric.render(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.registry = registry
+        registry.register(self)
+
+    def merge(self, total: Any, value: Any) -> Any:
+        raise NotImplementedError
+
+    def render(self, labels: str, value: Any) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        self.registry.update(
+            self.name,
+            _format_labels(labels),
+            lambda value: (value or 0) + amount
+        )
+
+    def merge(self, total, value):
+        return (total or 0) + value
+
+    def render(self, labels, value):
+        series = f"{self.name}{{{labels}}}" if labels else self.name
+        return [f"{series} {value}"]
+
+
+class Histogram(Metric):
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        self.buckets = buckets
+        super().__init__(name, documentation, **kwargs)
+
+    def observe(self, amount: float, **labels):
+        def _observe(value):
+            value = value or {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    value['buckets'][index] += 1
+            value['sum'] += amount
+            value['count'] += 1
+            return value
+        self.registry.update(self.name, _format_labels(labels), _observe)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def merge(self, total, value):
+        if total is None:
+            return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+        total['sum'] += value['sum']
+        total['count'] += value['count']
+        return total
+
+    def render(self, labels, value):
+        prefix = f"{labels}," if labels else ''
+        suffix = f"{{{labels}}}" if labels else ''
+        lines = [
+            f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, value['buckets'])
+        ]
+        lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {value["count"]}')
+        lines.append(f"{self.name}_sum{suffix} {value['sum']}")
+        lines.append(f"{self.name}_count{suffix} {value['count']}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'sandbox_request_duration_seconds',
+    'HTTP request duration by endpoint'
+)
+STAGE_DURATION = Histogram(
+    'sandbox_stage_duration_seconds',
+    'Duration of service stages: setup, compile, check, execute, checker, cleanup'
+)
+COMPILE_ERRORS = Counter(
+    'sandbox_compile_errors_total',
+    'Builds that ended with a compilation error'
+)
+PANICS = Counter(
+    'sandbox_panics_total',
+    'Program runs that panicked'
+)
+TIMEOUTS = Counter(
+    'sandbox_timeouts_total',
+    'Compilations and program runs that exceeded the time limit'
+)
+CHECKER_ERRORS = Counter(
+    'sandbox_checker_errors_total',
+    'Checker functions that raised an exception'
+)
+ARTIFACT_CACHE = Counter(
+    'sandbox_artifact_cache_total',
+    'Artifact cache lookups, evictions and coalesced builds by result'
+)
+RESULT_CACHE = Counter(
+    'sandbox_result_cache_total',
+    'Execution result cache lookups by result'
+)
+SHARED_CACHE = Counter(
+    'sandbox_shared_cache_total',
+    'Shared artifact cache lookups and evictions by result'
+)
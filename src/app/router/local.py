@@ -0,0 +1,90 @@
+"""Local stand-in for a multi-instance deployment.
+
+python -m app.router.local -n 3 --port 9009
+
+Starts n sandbox instances on port+1 .. port+n, each with its own
+SANDBOX_DIR so caches, slots and runners are as separate as on
+different hosts except the shared artifact cache, and the router on
+port in front of them. Killing an
+instance shows failover; Ctrl-C stops everything.
+"""
+import os
+import sys
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+from typing import List
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def router_command(bind: str, threads: int = 32) -> List[str]:
+    # Forwarding only waits on sockets, threads are cheap here
+    return [
+        sys.executable, '-m', 'gunicorn',
+        '--worker-class', 'gthread',
+        '--threads', str(threads),
+        '--bind', bind,
+        'app.router.main:app',
+    ]
+
+
+def start(instances: int, port: int, root: str) -> List[subprocess.Popen]:
+    procs, urls = [], []
+    shared_cache = os.path.join(root, 'shared-cache')
+    for index in range(instances):
+        sandbox_dir = os.path.join(root, f'instance{index}')
+        os.makedirs(sandbox_dir)
+        bind = f'127.0.0.1:{port + 1 + index}'
+        env = dict(
+            os.environ,
+            SANDBOX_DIR=sandbox_dir,
+            GUNICORN_BIND=bind,
+            SHARED_CACHE_DIR=os.environ.get('SHARED_CACHE_DIR', shared_cache),
+        )
+        procs.append(subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'python:app.gunicorn_conf', 'app.main:app'],
+            cwd=SRC_DIR,
+            env=env,
+        ))
+        urls.append(f'http://{bind}')
+
+    env = dict(os.environ, ROUTER_BACKENDS=','.join(urls))
+    procs.append(subprocess.Popen(
+        router_command(f'127.0.0.1:{port}'),
+        cwd=SRC_DIR,
+        env=env,
+    ))
+    return procs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Router and sandbox instances on this host')
+    parser.add_argument('-n', '--instances', type=int, default=3)
+    parser.add_argument('--port', type=int, default=9009, help='router port')
+    args = parser.parse_args()
+
+    # SIGTERM (docker stop, kill) cleans up like Ctrl-C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    root = tempfile.mkdtemp(prefix='sandbox_router_')
+    procs = start(args.instances, args.port, root)
+    try:
+        # Instances may be killed to try failover, only the router ends the run
+        while procs[-1].poll() is None:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Router in front of several sandbox instances.
+
+/debug/, /testing/ and /check/ are forwarded by consistent hash of the
+normalized source, so resubmissions of a program reach the instance
+whose caches already hold its build. An instance that refuses the
+connection, fails its readiness probe or is overloaded (503) is
+skipped for the next one on the ring.
+
+gunicorn -k gthread --threads 32 -b 0:9009 app.router.main:app
+with ROUTER_BACKENDS=http://sandbox-1:9009,http://sandbox-2:9009
+"""
+import os
+import json
+import time
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+from typing import Dict, Iterator, List, Optional
+
+from flask import Flask, Response, jsonify, request
+from app import config, messages
+from app.router.ring import HashRing, normalize
+
+
+FORWARDED = ('/debug/', '/testing/', '/check/')
+REQUEST_HEADERS = ('Content-Type', 'Accept')
+RESPONSE_HEADERS = ('Content-Type', 'Retry-After')
+STREAMING_MIMETYPES = ('application/x-ndjson', 'text/event-stream')
+CHUNK_SIZE = 64 * 1024
+
+
+def _connect(url: str, timeout: float) -> http.client.HTTPConnection:
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(
+        parts.hostname,
+        parts.port or 80,
+        timeout=config.ROUTER_CONNECT_TIMEOUT,
+    )
+    conn.connect()
+    conn.sock.settimeout(timeout)
+    return conn
+
+
+class Backends:
+
+    """Readiness of the sandbox instances.
+
+    A background thread, started lazily per process, probes
+    /health/ready of every instance each ROUTER_HEALTH_INTERVAL seconds;
+    a refused connection marks an instance down until the next probe.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self.healthy: Dict[str, bool] = {url: True for url in urls}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._poll, daemon=True).start()
+
+    def _poll(self):
+        while True:
+            for url in self.urls:
+                self.healthy[url] = self.probe(url)
+            time.sleep(config.ROUTER_HEALTH_INTERVAL)
+
+    @staticmethod
+    def probe(url: str) -> bool:
+        try:
+            conn = _connect(url, timeout=config.ROUTER_CONNECT_TIMEOUT)
+            try:
+                conn.request('GET', '/health/ready')
+                return conn.getresponse().status == 200
+            finally:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            return False
+
+    def mark_down(self, url: str):
+        self.healthy[url] = False
+
+    def order(self, urls: List[str]) -> List[str]:
+        """Healthy instances first; the others are still tried last, their
+        state may be older than the request."""
+        return (
+            [url for url in urls if self.healthy.get(url)]
+            + [url for url in urls if not self.healthy.get(url)]
+        )
+
+
+def _routing_key(body: bytes) -> str:
+    try:
+        code = json.loads(body).get('code')
+    except (ValueError, AttributeError):
+        code = None
+    return normalize(code) if isinstance(code, str) else ''
+
+
+def _relay(conn: http.client.HTTPConnection, resp: http.client.HTTPResponse, url: str) -> Response:
+    headers = {name: resp.getheader(name) for name in RESPONSE_HEADERS if resp.getheader(name)}
+    headers['X-Sandbox-Instance'] = url
+    if resp.getheader('Content-Type', '').split(';')[0] not in STREAMING_MIMETYPES:
+        body = resp.read()
+        conn.close()
+        return Response(body, status=resp.status, headers=headers)
+
+    def generate() -> Iterator[bytes]:
+        try:
+            while chunk := resp.read1(CHUNK_SIZE):
+                yield chunk
+        finally:
+            conn.close()
+
+    return Response(generate(), status=resp.status, headers=headers)
+
+
+def create_app(backends: Optional[List[str]] = None):
+    app = Flask(__name__)
+    urls = config.ROUTER_BACKENDS if backends is None else backends
+    ring = HashRing(urls, replicas=config.ROUTER_REPLICAS)
+    app.instances = instances = Backends(urls)
+
+    @app.before_request
+    def start_probes():
+        instances.start()
+
+    def forward():
+        body = request.get_data()
+        headers = {name: request.headers[name] for name in REQUEST_HEADERS if name in request.headers}
+        overloaded = None
+        for url in instances.order(ring.nodes_for(_routing_key(body))):
+            try:
+                conn = _connect(url, timeout=config.ROUTER_TIMEOUT)
+            except OSError:
+                instances.mark_down(url)
+                continue
+            try:
+                conn.request('POST', request.path, body, headers)
+                resp = conn.getresponse()
+            except socket.timeout:
+                conn.close()
+                return jsonify({'error': messages.MSG_16, 'details': url}), 504
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                instances.mark_down(url)
+                continue
+            if resp.status == 503:
+                overloaded = _relay(conn, resp, url)
+                continue
+            return _relay(conn, resp, url)
+
+        if overloaded is not None:
+            return overloaded
+        response = jsonify({'error': messages.MSG_15, 'details': None})
+        response.headers['Retry-After'] = str(config.RETRY_AFTER)
+        return response, 503
+
+    for path in FORWARDED:
+        app.add_url_rule(path, endpoint=path, view_func=forward, methods=['post'])
+
+    @app.route('/health/live', methods=['get'])
+    def health_live():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/health/ready', methods=['get'])
+    def health_ready():
+        ready = any(instances.healthy.values())
+        return jsonify({
+            'status': 'ready' if ready else 'unavailable',
+            'instances': instances.healthy,
+        }), 200 if ready else 503
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+from typing import List
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode()).digest()[:8], 'big')
+
+
+def normalize(code: str) -> str:
+    """Routing key of a submission: the source up to line endings and
+    trailing whitespace, so resubmissions from other editors land on
+    the same instance."""
+    lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+class HashRing:
+
+    """Consistent hash ring with `replicas` virtual points per node.
+
+    Adding or removing a node only moves the keys on its own arcs, the
+    other instances keep their warm caches.
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 100):
+        self.nodes = list(dict.fromkeys(nodes))
+        self._points = sorted(
+            (_hash(f'{node}#{index}'), node)
+            for node in self.nodes
+            for index in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    def nodes_for(self, key: str) -> List[str]:
+        """Every node in the order a key tries them: its owner first, then
+        the next distinct nodes clockwise."""
+        order: List[str] = []
+        start = bisect.bisect(self._hashes, _hash(key))
+        for offset in range(len(self._points)):
+            node = self._points[(start + offset) % len(self._points)][1]
+            if node not in order:
+                order.append(node)
+                if len(order) == len(self.nodes):
+                    break
+        return order
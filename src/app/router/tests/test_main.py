@@ -0,0 +1,191 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import messages
+from app.router.main import Backends, create_app
+
+
+class Instance:
+
+    """Stand-in sandbox instance answering with its own name."""
+
+    def __init__(self, status: int = 200, ready: bool = True, delay: float = 0):
+        self.status, self.ready, self.delay = status, ready, delay
+        self.requests = []
+        instance = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._send(200 if instance.ready else 503, b'{}', 'application/json')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                instance.requests.append((self.path, json.loads(body)))
+                time.sleep(instance.delay)
+                if self.headers.get('Accept') == 'application/x-ndjson':
+                    self._send(instance.status, b'{"event": "compile"}\n', 'application/x-ndjson')
+                else:
+                    self._send(instance.status, json.dumps({'url': instance.url}).encode(), 'application/json')
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def instances():
+    started = []
+
+    def start(count: int = 3, **kwargs):
+        new = [Instance(**kwargs) for _ in range(count)]
+        started.extend(new)
+        return new
+
+    yield start
+    for instance in started:
+        instance.close()
+
+
+@pytest.fixture(autouse=True)
+def no_probes(mocker):
+    mocker.patch.object(Backends, 'start')
+
+
+def _owner(client, code: str) -> str:
+    return client.post('/debug/', json={'code': code}).headers['X-Sandbox-Instance']
+
+
+def test_debug__same_code__same_instance(instances):
+
+    urls = [instance.url for instance in instances()]
+    client = create_app(urls).test_client()
+
+    owners = {_owner(client, 'fn main() {}\n') for _ in range(5)}
+
+    assert len(owners) == 1
+    assert _owner(client, 'fn main() {}\r\n') in owners
+
+
+def test_debug__body_and_path__forwarded(instances):
+
+    started = instances(count=1)
+    client = create_app([started[0].url]).test_client()
+
+    response = client.post('/testing/', json={'code': 'some code', 'tests': []})
+
+    assert response.status_code == 200
+    assert response.json == {'url': started[0].url}
+    assert started[0].requests == [('/testing/', {'code': 'some code', 'tests': []})]
+
+
+def test_debug__owner_down__next_instance(instances):
+
+    started = instances()
+    app = create_app([instance.url for instance in started])
+    client = app.test_client()
+    owner = _owner(client, 'some code')
+    next(instance for instance in started if instance.url == owner).close()
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.status_code == 200
+    assert response.headers['X-Sandbox-Instance'] != owner
+    assert app.instances.healthy[owner] is False
+
+
+def test_debug__owner_overloaded__next_instance(instances):
+
+    started = instances()
+    client = create_app([instance.url for instance in started]).test_client()
+    owner = _owner(client, 'some code')
+    next(instance for instance in started if instance.url == owner).status = 503
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.status_code == 200
+    assert response.headers['X-Sandbox-Instance'] != owner
+
+
+def test_debug__all_overloaded__service_unavailable(instances):
+
+    started = instances(status=503)
+    client = create_app([instance.url for instance in started]).test_client()
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.status_code == 503
+
+
+def test_debug__no_instance__service_unavailable():
+
+    client = create_app(['http://127.0.0.1:1']).test_client()
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.status_code == 503
+    assert response.json['error'] == messages.MSG_15
+    assert 'Retry-After' in response.headers
+
+
+def test_debug__instance_timeout__gateway_timeout(instances, mocker):
+
+    mocker.patch('app.config.ROUTER_TIMEOUT', 0.1)
+    started = instances(count=1, delay=1)
+    client = create_app([started[0].url]).test_client()
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.status_code == 504
+    assert response.json['error'] == messages.MSG_16
+
+
+def test_testing__ndjson__streamed(instances):
+
+    started = instances(count=1)
+    client = create_app([started[0].url]).test_client()
+
+    response = client.post(
+        '/testing/',
+        json={'code': 'some code'},
+        headers={'Accept': 'application/x-ndjson'},
+    )
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.data == b'{"event": "compile"}\n'
+
+
+def test_probe__warming_instance__unhealthy(instances):
+
+    warming, ready = instances(count=1, ready=False) + instances(count=1)
+
+    assert Backends.probe(warming.url) is False
+    assert Backends.probe(ready.url) is True
+
+
+def test_health_ready__no_healthy_instance__service_unavailable():
+
+    app = create_app(['http://127.0.0.1:1'])
+    app.instances.mark_down('http://127.0.0.1:1')
+
+    response = app.test_client().get('/health/ready')
+
+    assert response.status_code == 503
@@ -0,0 +1,56 @@
+from collections import Counter
+
+from app.router.ring import HashRing, normalize
+
+
+NODES = ['http://a:9009', 'http://b:9009', 'http://c:9009']
+
+
+def test_nodes_for__same_key__same_order():
+    # arrange
+    ring = HashRing(NODES)
+
+    # act
+    first = ring.nodes_for('fn main() {}')
+    second = HashRing(list(reversed(NODES))).nodes_for('fn main() {}')
+
+    # assert
+    assert first == second
+    assert sorted(first) == sorted(NODES)
+
+
+def test_nodes_for__many_keys__spread_over_nodes():
+    # arrange
+    ring = HashRing(NODES)
+
+    # act
+    owners = Counter(ring.nodes_for(f'key {index}')[0] for index in range(3000))
+
+    # assert
+    assert set(owners) == set(NODES)
+    assert min(owners.values()) > 600
+
+
+def test_nodes_for__node_added__only_its_keys_moved():
+    # arrange
+    keys = [f'key {index}' for index in range(3000)]
+    before = HashRing(NODES)
+    after = HashRing(NODES + ['http://d:9009'])
+
+    # act
+    moved = [key for key in keys if before.nodes_for(key)[0] != after.nodes_for(key)[0]]
+
+    # assert
+    assert all(after.nodes_for(key)[0] == 'http://d:9009' for key in moved)
+    assert len(moved) < len(keys) / 2
+
+
+def test_nodes_for__no_nodes__empty():
+    # act / assert
+    assert HashRing([]).nodes_for('key') == []
+
+
+def test_normalize__line_endings_and_trailing_spaces__ignored():
+    # act / assert
+    assert normalize('fn main() {  \r\n}\r\n') == normalize('fn main() {\n}')
+    assert normalize('fn main() {}') != normalize('fn  main() {}')
@@ -4,20 +4,32 @@ from marshmallow.fields import (
     Nested,
     Field,
     Boolean,
+    Float,
     Integer,
-    Method
+    Method,
+    String,
+    Raw
 )
+from marshmallow.validate import OneOf, Range
 from marshmallow.decorators import (
     post_load,
-    pre_dump
+    post_dump,
+    pre_dump,
+    validates_schema
 )
+from app import config
 from app.entities import (
+    CheckData,
     DebugData,
+    Limits,
     TestData,
-    TestsData
+    TestsData,
+    Job
 )
 from app.utils import clean_str
 from app.service.exceptions import ServiceException
+from app.service.comparators import get_comparator
+from app.service.profiles import PROFILES
 
 
 class StrField(Field):
@@ -29,7 +41,46 @@ class StrField(Field):
         return clean_str(value)
 
 
-class DebugSchema(Schema):
+class UsageSchema(Schema):
+
+    wall_time = Float(dump_only=True)
+    cpu_time = Float(dump_only=True)
+    max_rss = Integer(dump_only=True)
+
+    @post_dump
+    def drop_empty_usage(self, data, **kwargs):
+        for name in ('wall_time', 'cpu_time', 'max_rss'):
+            if data.get(name, 0) is None:
+                del data[name]
+        return data
+
+
+class LimitsSchema(Schema):
+
+    timeout = Float(validate=Range(min=0, min_inclusive=False))
+    cpu_timeout = Integer(validate=Range(min=1))
+    request_timeout = Float(validate=Range(min=0, min_inclusive=False))
+
+    @validates_schema
+    def validate_maxima(self, data, **kwargs):
+        maxima = {
+            'timeout': config.MAX_TIMEOUT,
+            'cpu_timeout': config.MAX_CPU_TIMEOUT,
+            'request_timeout': config.MAX_REQUEST_TIMEOUT,
+        }
+        for name, maximum in maxima.items():
+            if data.get(name, 0) > maximum:
+                raise ValidationError(
+                    f'Must be less than or equal to {maximum}.',
+                    name
+                )
+
+    @post_load
+    def make_limits(self, data, **kwargs) -> Limits:
+        return Limits(**data)
+
+
+class DebugSchema(UsageSchema):
 
     data_in = StrField(
         required=False,
@@ -37,6 +88,11 @@ class DebugSchema(Schema):
         load_only=True
     )
     code = StrField(required=True, load_only=True)
+    stats = Boolean(load_only=True)
+    check_only = Boolean(load_only=True)
+    profile = String(load_only=True, validate=OneOf(PROFILES))
+    no_cache = Boolean(load_only=True)
+    limits = Nested(LimitsSchema, load_only=True)
     result = StrField(dump_only=True)
     error = StrField(dump_only=True)
 
@@ -45,7 +101,19 @@ class DebugSchema(Schema):
         return DebugData(**data)
 
 
-class TestSchema(Schema):
+class CheckSchema(Schema):
+
+    code = StrField(required=True, load_only=True)
+    ok = Boolean(dump_only=True)
+    error = StrField(dump_only=True)
+    details = StrField(dump_only=True)
+
+    @post_load
+    def make_check_data(self, data, **kwargs) -> CheckData:
+        return CheckData(**data)
+
+
+class TestSchema(UsageSchema):
 
     data_in = StrField(load_only=True)
     data_out = StrField(required=True, load_only=True)
@@ -58,15 +126,34 @@ class TestSchema(Schema):
         return TestData(**data)
 
 
-class TestsSchema(Schema):
+class TestsSchema(UsageSchema):
 
     tests = Nested(TestSchema, many=True, required=True)
-    checker = StrField(load_only=True, required=True)
+    checker = StrField(load_only=True)
+    comparator = StrField(load_only=True)
     code = StrField(load_only=True, required=True)
+    stats = Boolean(load_only=True)
+    check_only = Boolean(load_only=True)
+    profile = String(load_only=True, validate=OneOf(PROFILES))
+    no_cache = Boolean(load_only=True)
+    limits = Nested(LimitsSchema, load_only=True)
     num = Integer(dump_only=True)
     num_ok = Integer(dump_only=True)
     ok = Boolean(dump_only=True)
 
+    @validates_schema
+    def validate_checker(self, data, **kwargs):
+        if data.get('comparator'):
+            try:
+                get_comparator(data['comparator'])
+            except ServiceException as ex:
+                raise ValidationError(ex.message, 'comparator')
+        elif not data.get('checker'):
+            raise ValidationError(
+                self.fields['checker'].error_messages['required'],
+                'checker'
+            )
+
     @post_load
     def make_tests_data(self, data, **kwargs) -> TestsData:
         return TestsData(**data)
@@ -74,12 +161,47 @@ class TestsSchema(Schema):
     @pre_dump
     def calculate_properties(self, data: TestsData, **kwargs):
         data.num = len(data.tests)
-        for test in data.tests:
-            if test.ok:
-                data.num_ok += 1
+        data.num_ok = sum(1 for test in data.tests if test.ok)
         data.ok = data.num == data.num_ok
+
+        wall_times = [test.wall_time for test in data.tests if test.wall_time is not None]
+        cpu_times = [test.cpu_time for test in data.tests if test.cpu_time is not None]
+        max_rss = [test.max_rss for test in data.tests if test.max_rss is not None]
+        data.wall_time = sum(wall_times) if wall_times else None
+        data.cpu_time = sum(cpu_times) if cpu_times else None
+        data.max_rss = max(max_rss) if max_rss else None
+        return data
+
+
+JOB_SCHEMAS = {
+    'debug': DebugSchema,
+    'testing': TestsSchema,
+}
+
+
+class JobSchema(Schema):
+
+    id = String(dump_only=True)
+    type = String(required=True, validate=OneOf(JOB_SCHEMAS))
+    data = Raw(required=True, load_only=True)
+    status = String(dump_only=True)
+    result = Method('dump_result', dump_only=True)
+    error = StrField(dump_only=True)
+    details = Raw(dump_only=True)
+
+    @post_load
+    def load_data(self, data, **kwargs):
+        try:
+            data['data'] = JOB_SCHEMAS[data['type']]().load(data['data'])
+        except ValidationError as ex:
+            raise ValidationError(ex.messages, 'data')
         return data
 
+    def dump_result(self, job: Job):
+        if job.status in ('queued', 'failed'):
+            return None
+        return JOB_SCHEMAS[job.type]().dump(job.data)
+
 
 class BadRequestSchema(Schema):
 
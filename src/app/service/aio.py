@@ -0,0 +1,277 @@
+"""asyncio variant of RustService.
+
+Compilers and programs are child processes awaited on the event loop
+instead of threads blocked in wait(), so a single process can supervise
+dozens of concurrent requests. Caches, scheduler slots, limits and
+result classification are shared with RustService.
+"""
+import os
+import time
+import asyncio
+import contextlib
+import subprocess
+from typing import Optional
+
+from app import config, messages, metrics
+from app.entities import CheckData, DebugData, Limits, TestData, TestsData
+from app.service import exceptions
+from app.service.backends import get_backend
+from app.service.cache import AsyncMemo
+from app.service.entities import ExecuteResult, RustFile
+from app.service.main import RustService
+from app.service.process import acommunicate
+from app.service.runner import AsyncRemoteProcess
+from app.utils import clean_error, clean_paths
+
+
+async def _kill(proc):
+    if proc.returncode is None:
+        with contextlib.suppress(ProcessLookupError):
+            proc.kill()
+        await proc.wait()
+
+
+class AsyncRustService:
+
+    sync = RustService
+
+    @classmethod
+    async def _compile(cls, file: RustFile, check_only: bool = False) -> Optional[str]:
+        backend = get_backend(config.COMPILE_BACKEND)
+        proc = await asyncio.create_subprocess_exec(
+            *(backend.check_command(file) if check_only else backend.command(file)),
+            cwd=file.project_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            _, err = await asyncio.wait_for(proc.communicate(), config.COMPILE_TIMEOUT)
+            err = err.decode(errors='replace')
+        except asyncio.TimeoutError:
+            err = messages.MSG_RUST_COMPILE_TIMEOUT
+        finally:
+            await _kill(proc)
+
+        if proc.returncode == 0 and not err:
+            return None
+        return err
+
+    @classmethod
+    async def _build(cls, file: RustFile) -> Optional[str]:
+        if not config.ARTIFACT_CACHE_ENABLED:
+            return await cls._compile_counted(file)
+
+        key = cls.sync._build_key(file)
+        if (cached := cls.sync._restore(key, file))[0]:
+            return cached[1]
+
+        async with cls.sync.artifact_cache.aflight(key) as waited:
+            if waited and (cached := cls.sync._restore(key, file))[0]:
+                metrics.ARTIFACT_CACHE.inc(result='coalesced')
+                return cached[1]
+            err = await cls._compile_counted(file)
+            cls.sync._store(key, file, err)
+        return err
+
+    @classmethod
+    async def _compile_counted(cls, file: RustFile) -> Optional[str]:
+        async with cls.sync.scheduler.acompile_slot():
+            with metrics.STAGE_DURATION.time(stage='compile'):
+                err = await cls._compile(file)
+        cls.sync._count_compile_error(err)
+        return err
+
+    @classmethod
+    async def _typecheck(cls, file: RustFile) -> Optional[str]:
+        async with cls.sync.scheduler.acompile_slot():
+            with metrics.STAGE_DURATION.time(stage='check'):
+                err = await cls._compile(file, check_only=True)
+        cls.sync._count_compile_error(err)
+        return err
+
+    @classmethod
+    async def _spawn(cls, file: RustFile, limits: Limits):
+        if config.RUNNER_ENABLED:
+            try:
+                return await AsyncRemoteProcess.create(
+                    [file.filepath_out],
+                    cpu_timeout=limits.cpu_timeout
+                )
+            except OSError as ex:
+                raise exceptions.ExecutionException(details=str(ex))
+
+        env = os.environ.copy()
+        env["RUST_BACKTRACE"] = "0"
+        return await asyncio.create_subprocess_exec(
+            file.filepath_out,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=cls.sync._drop_privileges(cpu_timeout=limits.cpu_timeout),
+            env=env,
+        )
+
+    @classmethod
+    async def _execute(
+        cls,
+        file: RustFile,
+        data_in: Optional[str] = None,
+        limits: Optional[Limits] = None,
+    ) -> ExecuteResult:
+        limits = limits or cls.sync._limits()
+        if isinstance(data_in, str) and "\n" in data_in:
+            data_in = data_in.replace("\n", " ")
+
+        start = time.perf_counter()
+        proc = await cls._spawn(file, limits)
+        try:
+            out, err, truncated = await acommunicate(
+                proc,
+                input=data_in,
+                timeout=limits.timeout,
+                limit=config.OUTPUT_LIMIT,
+            )
+        except subprocess.TimeoutExpired:
+            return cls.sync._timeout_result(wall_time=time.perf_counter() - start)
+        except Exception as ex:
+            raise exceptions.ExecutionException(details=str(ex))
+        finally:
+            await _kill(proc)
+
+        return cls.sync._execute_result(
+            proc, out, err, truncated, limits,
+            wall_time=time.perf_counter() - start
+        )
+
+    @classmethod
+    async def _run(
+        cls,
+        file: RustFile,
+        data_in: Optional[str] = None,
+        limits: Optional[Limits] = None,
+        deadline: Optional[float] = None,
+    ) -> ExecuteResult:
+        limits, by_budget = cls.sync._clip(limits or cls.sync._limits(), deadline)
+        if limits is None:
+            return ExecuteResult(result=None, error=messages.MSG_14)
+
+        async with cls.sync.scheduler.aexec_slot():
+            with metrics.STAGE_DURATION.time(stage='execute'):
+                exec_res = await cls._execute(file=file, data_in=data_in, limits=limits)
+        return cls.sync._count_run(exec_res, by_budget)
+
+    @classmethod
+    async def _run_cached(
+        cls,
+        file: RustFile,
+        data_in: Optional[str] = None,
+        limits: Optional[Limits] = None,
+        deadline: Optional[float] = None,
+        no_cache: bool = False,
+    ) -> ExecuteResult:
+        if no_cache or not config.RESULT_CACHE_ENABLED:
+            return await cls._run(file=file, data_in=data_in, limits=limits, deadline=deadline)
+
+        key = cls.sync._result_key(file, data_in, limits or cls.sync._limits())
+        if (exec_res := cls.sync.result_cache.get(key)) is not None:
+            metrics.RESULT_CACHE.inc(result='hits')
+            return exec_res
+
+        metrics.RESULT_CACHE.inc(result='misses')
+        exec_res = await cls._run(file=file, data_in=data_in, limits=limits, deadline=deadline)
+        if exec_res.error not in cls.sync.UNCACHED_ERRORS:
+            cls.sync.result_cache.put(key, exec_res)
+        return exec_res
+
+    @classmethod
+    async def debug(cls, data: DebugData) -> DebugData:
+        with cls.sync.scheduler.admit():
+            limits = cls.sync._limits(data.limits)
+            deadline = time.monotonic() + limits.request_timeout
+            with metrics.STAGE_DURATION.time(stage='setup'):
+                rust = RustFile(data.code, profile=data.profile or config.DEBUG_PROFILE)
+
+            if data.check_only:
+                data.error = await cls._typecheck(rust)
+            elif (err := await cls._build(rust)):
+                data.error = err
+            else:
+                exec_res = await cls._run_cached(
+                    file=rust,
+                    data_in=data.data_in,
+                    limits=limits,
+                    deadline=deadline,
+                    no_cache=data.no_cache,
+                )
+                data.result, data.error = exec_res.result, exec_res.error
+                if data.stats and exec_res.usage:
+                    data.wall_time, data.cpu_time, data.max_rss = exec_res.usage
+
+            with metrics.STAGE_DURATION.time(stage='cleanup'):
+                rust.remove()
+        return data
+
+    @classmethod
+    async def check(cls, data: CheckData) -> CheckData:
+        with cls.sync.scheduler.admit():
+            with metrics.STAGE_DURATION.time(stage='setup'):
+                rust = RustFile(data.code)
+            err = await cls._typecheck(rust)
+            with metrics.STAGE_DURATION.time(stage='cleanup'):
+                rust.remove()
+
+        data.ok = err is None
+        data.details = clean_paths(err, rust.project_dir)
+        data.error = clean_error(data.details)
+        return data
+
+    @classmethod
+    async def _run_test(
+        cls,
+        file: RustFile,
+        data: TestsData,
+        test: TestData,
+        limits: Optional[Limits] = None,
+        deadline: Optional[float] = None,
+        memo: Optional[AsyncMemo] = None,
+    ) -> TestData:
+        def run():
+            return cls._run_cached(
+                file=file,
+                data_in=test.data_in,
+                limits=limits,
+                deadline=deadline,
+                no_cache=data.no_cache,
+            )
+
+        exec_res = await (run() if memo is None else memo.get(test.data_in, run))
+        return cls.sync._grade(data, test, exec_res)
+
+    @classmethod
+    async def testing(cls, data: TestsData) -> TestsData:
+        with cls.sync.scheduler.admit():
+            limits = cls.sync._limits(data.limits)
+            deadline = time.monotonic() + limits.request_timeout
+            with metrics.STAGE_DURATION.time(stage='setup'):
+                rust = RustFile(data.code, profile=data.profile or config.TESTING_PROFILE)
+            if data.check_only:
+                compile_err = await cls._typecheck(rust)
+            else:
+                compile_err = await cls._build(rust)
+
+            if compile_err:
+                for test in data.tests:
+                    test.error, test.ok = compile_err, False
+            elif not data.check_only:
+                memo = None if data.no_cache else AsyncMemo()
+                workers = asyncio.Semaphore(max(config.TEST_WORKERS, 1))
+
+                async def run_test(test: TestData):
+                    async with workers:
+                        await cls._run_test(rust, data, test, limits, deadline, memo)
+
+                await asyncio.gather(*(run_test(test) for test in data.tests))
+
+            with metrics.STAGE_DURATION.time(stage='cleanup'):
+                rust.remove()
+        return data
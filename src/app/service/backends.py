@@ -0,0 +1,75 @@
+import os
+import shutil
+from typing import List, Dict
+
+from app.service import crates
+from app.service.entities import RustFile
+from app.service.profiles import get_profile, rustc_flags
+
+
+class CargoBackend:
+
+    name = 'cargo'
+    executable = 'cargo'
+
+    def command(self, file: RustFile) -> List[str]:
+        profile = get_profile(file.profile)
+        return self._cargo("build", ["--profile", profile.name])
+
+    def check_command(self, file: RustFile) -> List[str]:
+        return self._cargo("check", ["--release"])
+
+    def _cargo(self, subcommand: str, options: List[str]) -> List[str]:
+        flags = crates.rustc_flags()
+        if not flags:
+            return [self.executable, subcommand, *options, "--quiet"]
+        # `cargo rustc` hands the prebuilt crates to the final rustc call,
+        # with --profile=check it type-checks like `cargo check`
+        if subcommand == "check":
+            options = ["--profile=check"]
+        return [self.executable, "rustc", *options, "--quiet", "--", *flags]
+
+
+class RustcBackend:
+
+    """Single rustc invocation on main.rs, the binary is written straight
+    to RustFile.filepath_out without cargo's manifest and lock-file work."""
+
+    name = 'rustc'
+    executable = 'rustc'
+
+    def command(self, file: RustFile) -> List[str]:
+        return [
+            self.executable,
+            "--edition", "2021",
+            "--crate-name", file.package_name,
+            *rustc_flags(get_profile(file.profile)),
+            *crates.rustc_flags(),
+            "-o", file.filepath_out,
+            os.path.join("src", "main.rs"),
+        ]
+
+    def check_command(self, file: RustFile) -> List[str]:
+        # Parsing, type and borrow checking only, no codegen or linking
+        return [
+            self.executable,
+            "--edition", "2021",
+            "--crate-name", file.package_name,
+            "--emit=metadata",
+            *crates.rustc_flags(),
+            "-o", os.path.join("target", f"lib{file.package_name}.rmeta"),
+            os.path.join("src", "main.rs"),
+        ]
+
+
+BACKENDS: Dict[str, type] = {
+    CargoBackend.name: CargoBackend,
+    RustcBackend.name: RustcBackend,
+}
+
+
+def get_backend(name: str):
+    backend = BACKENDS.get(name, CargoBackend)()
+    if shutil.which(backend.executable) is None:
+        return CargoBackend()
+    return backend
@@ -0,0 +1,329 @@
+import os
+import time
+import asyncio
+import fcntl
+import shutil
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional
+
+from app import config, metrics
+
+
+LOCK_TTL = 3600  # seconds, unused lock files older than this are removed
+FLIGHT_POLL_INTERVAL = 0.02  # seconds
+GC_LOCK = '.gc.lock'
+
+
+@lru_cache(maxsize=None)
+def toolchain_version() -> str:
+    try:
+        proc = subprocess.run(
+            ["rustc", "-vV"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=config.COMPILE_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return proc.stdout
+
+
+def make_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _link(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ArtifactCache:
+
+    """On-disk LRU cache of compiled binaries bounded by total size.
+
+    Entries are files named by key and recency is tracked by mtime, so
+    several worker processes can share one directory. Binaries are
+    hard-linked in and out, an evicted entry never breaks a running program.
+    Compile errors are kept next to them as <key>.err.
+    """
+
+    counter = metrics.ARTIFACT_CACHE
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+        self.counter.inc(result=name)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str, filepath: str) -> bool:
+        path = self._path(key)
+        try:
+            os.utime(path)
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            _link(path, filepath)
+        except FileNotFoundError:
+            self._count('misses')
+            return False
+        self._count('hits')
+        return True
+
+    def store(self, key: str, filepath: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        _link(filepath, tmp_path)
+        os.chmod(tmp_path, 0o755)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def restore_error(self, key: str) -> Optional[str]:
+        path = f"{self._path(key)}.err"
+        try:
+            os.utime(path)
+            with open(path) as file:
+                error = file.read()
+        except FileNotFoundError:
+            return None
+        self._count('hits')
+        return error
+
+    def store_error(self, key: str, error: str):
+        path = f"{self._path(key)}.err"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(error)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    @contextmanager
+    def flight(self, key: str):
+        """Exclusive lock on <key>.lock, one build per key at a time for
+        every thread and process sharing the directory. Yields True if
+        another holder had to be waited for."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{self._path(key)}.lock", 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                waited = False
+            except BlockingIOError:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                waited = True
+            try:
+                yield waited
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def aflight(self, key: str):
+        """flight() for coroutines, polls the lock instead of blocking."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{self._path(key)}.lock", 'w') as lock:
+            waited = False
+            while True:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    waited = True
+                    await asyncio.sleep(FLIGHT_POLL_INTERVAL)
+            try:
+                yield waited
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _scan(self) -> Iterator[os.DirEntry]:
+        with os.scandir(self.directory) as it:
+            yield from it
+
+    def _evict(self):
+        entries = []
+        now = time.time()
+        for entry in self._scan():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(('.lock', '.tmp')):
+                # Left behind by crashed workers once this old
+                if now - stat.st_mtime > LOCK_TTL:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self._count('evictions')
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class SharedArtifactCache(ArtifactCache):
+
+    """Second tier of the artifact cache on a filesystem shared by
+    several containers, looked up after a local miss.
+
+    Entries are fanned out into <key[:2]>/ subdirectories. They are
+    copied in under a temporary name and renamed into place, so readers
+    never see a partial binary. Garbage collection scans the whole
+    store, so it runs at most every SHARED_CACHE_GC_INTERVAL seconds per
+    process and only in the process holding the flock on .gc.lock; the
+    others skip it.
+    """
+
+    counter = metrics.SHARED_CACHE
+
+    def __init__(self, directory: str, max_size: int):
+        super().__init__(directory, max_size)
+        self._collected = 0.0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self) -> Iterator[os.DirEntry]:
+        with os.scandir(self.directory) as it:
+            subdirs = [entry.path for entry in it if entry.is_dir()]
+        for subdir in subdirs:
+            try:
+                with os.scandir(subdir) as it:
+                    yield from it
+            except FileNotFoundError:
+                continue
+
+    def _evict(self):
+        now = time.monotonic()
+        if self._collected and now - self._collected < config.SHARED_CACHE_GC_INTERVAL:
+            return
+        self._collected = now
+        with open(os.path.join(self.directory, GC_LOCK), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # another process or container is collecting
+            try:
+                super()._evict()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class LRUCache:
+
+    """In-memory LRU bounded by entry count and, if maxbytes is given,
+    by the total of sizeof() over the values."""
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        maxbytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = lambda value: 0,
+    ):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._data: OrderedDict = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def put(self, key: str, value: Any):
+        size = self.sizeof(value)
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        with self._lock:
+            self.size += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            while (
+                (self.maxsize is not None and len(self._data) > self.maxsize)
+                or (self.maxbytes is not None and self.size > self.maxbytes)
+            ):
+                old_key, _ = self._data.popitem(last=False)
+                self.size -= self._sizes.pop(old_key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class Memo:
+
+    """Results of calls by key for the lifetime of one request. A caller
+    arriving while the first call with its key is running waits for it."""
+
+    def __init__(self):
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(fn())
+            except BaseException as ex:
+                future.set_exception(ex)
+        return future.result()
+
+
+class AsyncMemo:
+
+    """Memo for coroutines of one event loop."""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if (task := self._tasks.get(key)) is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+        # A cancelled waiter must not cancel the call other waiters share
+        return await asyncio.shield(task)
@@ -0,0 +1,72 @@
+import math
+from functools import lru_cache
+from typing import Callable, Optional
+
+from app import messages
+from app.service import exceptions
+
+
+Comparator = Callable[[Optional[str], Optional[str]], bool]
+
+
+def exact(right_value: Optional[str], value: Optional[str]) -> bool:
+    return (right_value or '') == (value or '')
+
+
+def tokens(right_value: Optional[str], value: Optional[str]) -> bool:
+    return (right_value or '').split() == (value or '').split()
+
+
+def lines_unordered(right_value: Optional[str], value: Optional[str]) -> bool:
+    def _lines(text: Optional[str]):
+        return sorted(line.rstrip() for line in (text or '').splitlines())
+    return _lines(right_value) == _lines(value)
+
+
+def _float_tokens(tolerance: float) -> Comparator:
+
+    def _compare(right_value: Optional[str], value: Optional[str]) -> bool:
+        expected = (right_value or '').split()
+        actual = (value or '').split()
+        if len(expected) != len(actual):
+            return False
+        for right_token, token in zip(expected, actual):
+            if right_token == token:
+                continue
+            try:
+                right_number, number = float(right_token), float(token)
+            except ValueError:
+                return False
+            if not math.isclose(
+                right_number,
+                number,
+                rel_tol=tolerance,
+                abs_tol=tolerance
+            ):
+                return False
+        return True
+
+    return _compare
+
+
+COMPARATORS = {
+    'exact': exact,
+    'tokens': tokens,
+    'lines-unordered': lines_unordered,
+}
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+
+
+@lru_cache(maxsize=64)
+def get_comparator(spec: str) -> Comparator:
+    name, _, arg = spec.partition(':')
+    if name in COMPARATORS and not arg:
+        return COMPARATORS[name]
+    if name == 'float':
+        try:
+            tolerance = float(arg) if arg else DEFAULT_FLOAT_TOLERANCE
+        except ValueError:
+            tolerance = -1
+        if tolerance >= 0:
+            return _float_tokens(tolerance)
+    raise exceptions.CheckerException(message=messages.MSG_9)
@@ -0,0 +1,129 @@
+"""Allow-listed third-party crates, prebuilt once and linked into submissions.
+
+build() vendors the crates into <directory>/vendor, compiles them with
+cargo and records the resulting rlibs in index.json. The backends pass
+them to rustc with --extern and -L dependency=, so using a crate costs
+a link rather than a rebuild and no network is needed at request time.
+
+Usage (at image build): python -m app.service.crates /opt/crates
+"""
+import os
+import sys
+import json
+import subprocess
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+from app import config
+from app.service.cache import toolchain_version
+
+
+CRATES: Dict[str, Union[str, Dict[str, str]]] = {
+    'itertools': '0.13',
+    'rand': '0.8',
+    'regex': '1',
+}
+INDEX = 'index.json'
+
+
+def _manifest(crates: Dict[str, Union[str, Dict[str, str]]]) -> str:
+    lines = [
+        '[package]',
+        'name = "sandbox_crates"',
+        'version = "0.1.0"',
+        'edition = "2021"',
+        '',
+        '[dependencies]',
+    ]
+    for name, spec in sorted(crates.items()):
+        if isinstance(spec, str):
+            spec = {'version': spec}
+        fields = ', '.join(f'{key} = "{value}"' for key, value in spec.items())
+        lines.append(f'{name} = {{ {fields} }}')
+    return '\n'.join(lines) + '\n'
+
+
+def build(directory: str, crates: Optional[Dict[str, Union[str, Dict[str, str]]]] = None) -> dict:
+    crates = CRATES if crates is None else crates
+    os.makedirs(os.path.join(directory, 'src'), exist_ok=True)
+    os.makedirs(os.path.join(directory, '.cargo'), exist_ok=True)
+    with open(os.path.join(directory, 'Cargo.toml'), 'w') as manifest:
+        manifest.write(_manifest(crates))
+    open(os.path.join(directory, 'src', 'lib.rs'), 'w').close()
+
+    vendor = subprocess.run(
+        ['cargo', 'vendor', '--versioned-dirs', 'vendor'],
+        cwd=directory,
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+    # Source replacement printed by cargo vendor, empty if nothing was vendored
+    with open(os.path.join(directory, '.cargo', 'config.toml'), 'w') as cargo_config:
+        cargo_config.write(vendor.stdout)
+
+    proc = subprocess.run(
+        ['cargo', 'build', '--release', '--offline', '--message-format=json'],
+        cwd=directory,
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+    wanted = {name.replace('-', '_') for name in crates}
+    externs = {}
+    for line in proc.stdout.splitlines():
+        message = json.loads(line)
+        if message.get('reason') != 'compiler-artifact':
+            continue
+        name = message['target']['name'].replace('-', '_')
+        rlibs = [path for path in message['filenames'] if path.endswith('.rlib')]
+        if name in wanted and rlibs:
+            externs[name] = rlibs[0]
+
+    index = {
+        'toolchain': toolchain_version(),
+        'deps_dir': os.path.join(directory, 'target', 'release', 'deps'),
+        'crates': externs,
+    }
+    tmp_path = os.path.join(directory, f'{INDEX}.tmp')
+    with open(tmp_path, 'w') as file:
+        json.dump(index, file, indent=2)
+    os.replace(tmp_path, os.path.join(directory, INDEX))
+    return index
+
+
+@lru_cache(maxsize=4)
+def _load(path: str, mtime: float) -> Optional[dict]:
+    with open(path) as file:
+        index = json.load(file)
+    # rlibs from another compiler version can not be linked
+    if index.get('toolchain') != toolchain_version():
+        return None
+    return index
+
+
+def load_index() -> Optional[dict]:
+    path = os.path.join(config.CRATES_DIR, INDEX)
+    try:
+        return _load(path, os.stat(path).st_mtime)
+    except (OSError, ValueError):
+        return None
+
+
+def rustc_flags() -> List[str]:
+    index = load_index()
+    if not index or not index['crates']:
+        return []
+    flags = ['-L', f"dependency={index['deps_dir']}"]
+    for name, path in sorted(index['crates'].items()):
+        flags += ['--extern', f'{name}={path}']
+    return flags
+
+
+def fingerprint() -> str:
+    index = load_index()
+    return json.dumps(index, sort_keys=True) if index else ''
+
+
+if __name__ == '__main__':
+    build(sys.argv[1] if len(sys.argv) > 1 else config.CRATES_DIR)
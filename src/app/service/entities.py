@@ -1,8 +1,8 @@
 import os
-import uuid
-import shutil
 from collections import namedtuple
 from app import config
+from app.service.pool import ProjectPool
+from app.service.profiles import DEFAULT_PROFILE, get_profile, manifest_sections
 
 import re
 
@@ -51,44 +51,46 @@ def _wrap_rust_code(code: str) -> str:
     result_parts.append(main_block)
     return '\n'.join(result_parts)
 
-ExecuteResult = namedtuple('ExecuteResult', ('result', 'error'))
+ExecuteResult = namedtuple('ExecuteResult', ('result', 'error', 'usage'), defaults=(None,))
+Usage = namedtuple('Usage', ('wall_time', 'cpu_time', 'max_rss'))
+
+PACKAGE_NAME = 'sandbox_proj'
+MANIFEST = f"""[package]
+name = "{PACKAGE_NAME}"
+version = "0.1.0"
+edition = "2021"
+
+[dependencies]
+
+""" + manifest_sections()
+
+
+project_pool = ProjectPool(size=config.PROJECT_POOL_SIZE, manifest=MANIFEST)
+
 
 class RustFile:
 
-    def __init__(self, code: str):
-        file_id = str(uuid.uuid4()).replace('-', '_')
-        self.package_name = f"sandbox_proj_{file_id}"
-        self.project_dir = os.path.join(config.SANDBOX_DIR, self.package_name)
+    def __init__(self, code: str, profile: str = DEFAULT_PROFILE):
+        self.package_name = PACKAGE_NAME
+        self.profile = get_profile(profile).name
+        self.project_dir = project_pool.acquire()
         self.src_dir = os.path.join(self.project_dir, 'src')
-        os.makedirs(self.src_dir, exist_ok=True)
-
-        import re
-        main_regex = re.compile(r'\bfn\s+main\s*\(')
-        if not main_regex.search(code):
-            code = _wrap_rust_code(code)
 
+        self.code = _wrap_rust_code(code)
         self.filepath_rs = os.path.join(self.src_dir, 'main.rs')
         with open(self.filepath_rs, 'w') as file:
-            file.write(code)
+            file.write(self.code)
 
+        self.manifest = MANIFEST
         self.manifest_path = os.path.join(self.project_dir, 'Cargo.toml')
-        with open(self.manifest_path, 'w') as manifest:
-            manifest.write(f"""[package]
-                                name = "{self.package_name}"
-                                version = "0.1.0"
-                                edition = "2021"
-
-                                [dependencies] 
-                                """)
+        # cargo puts every profile into target/<profile>/
         self.filepath_out = os.path.join(
             self.project_dir,
             'target',
-            'release',
-            self.package_name.replace('-', '_')
+            self.profile,
+            self.package_name
         )
+        os.makedirs(os.path.dirname(self.filepath_out), exist_ok=True)
 
     def remove(self):
-        try:
-            shutil.rmtree(self.project_dir, ignore_errors=True)
-        except FileNotFoundError:
-            pass
\ No newline at end of file
+        project_pool.release(self.project_dir)
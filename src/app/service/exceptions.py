@@ -29,3 +29,8 @@ class ExecutionException(ServiceException):
 class CompileException(ServiceException):
 
     default_message = messages.MSG_7
+
+
+class OverloadedException(ServiceException):
+
+    default_message = messages.MSG_11
@@ -0,0 +1,123 @@
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Union
+
+from app import config
+from app.entities import Job, DebugData, TestsData
+from app.service import exceptions
+from app.service.main import RustService
+
+
+class JobQueue:
+
+    """In-process queue running debug/testing jobs on background threads.
+
+    Jobs live in memory of the process that accepted them; every state
+    change is also written to JOB_DIR, so whichever gunicorn worker gets
+    the poll can answer it.
+    """
+
+    def __init__(self, dump: Callable[[Job], dict]):
+        self.dump = dump
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue: queue.Queue = queue.Queue()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            for _ in range(config.JOB_WORKERS):
+                threading.Thread(target=self._worker, daemon=True).start()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(config.JOB_DIR, f"{job_id}.json")
+
+    def _save(self, job: Job):
+        os.makedirs(config.JOB_DIR, exist_ok=True)
+        path = self._path(job.id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.dump(job), file)
+        os.replace(tmp_path, path)
+
+    def _run(self, job: Job):
+        job.status = 'running'
+        self._save(job)
+        try:
+            getattr(RustService, job.type)(job.data)
+        except exceptions.ServiceException as ex:
+            job.status, job.error, job.details = 'failed', ex.message, ex.details
+        except Exception as ex:
+            job.status, job.error = 'failed', str(ex)
+        else:
+            job.status = 'done'
+        job.finished = time.time()
+        self._save(job)
+
+    def _worker(self):
+        while True:
+            self._run(self._queue.get())
+
+    def _evict(self):
+        deadline = time.time() - config.JOB_RETENTION
+        with self._lock:
+            excess = len(self._jobs) - config.JOB_MAX_JOBS
+            for job in list(self._jobs.values()):
+                if job.finished is None:
+                    continue
+                if job.finished < deadline or excess > 0:
+                    del self._jobs[job.id]
+                    excess -= 1
+            own = set(self._jobs)
+
+        # Snapshots left behind by other or restarted worker processes
+        try:
+            entries = list(os.scandir(config.JOB_DIR))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            job_id = entry.name.split('.', 1)[0]
+            if job_id in own:
+                continue
+            try:
+                if entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+    def submit(self, job_type: str, data: Union[DebugData, TestsData]) -> Job:
+        self._evict()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.finished is None)
+            if pending >= config.JOB_MAX_JOBS:
+                raise exceptions.OverloadedException()
+            job = Job(type=job_type, data=data, id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+        self._save(job)
+        self._ensure_started()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Any]:
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+            return None
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return self.dump(job)
+        try:
+            with open(self._path(job_id)) as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
@@ -1,34 +1,77 @@
 import os
 import re
+import math
+import time
+import signal
+import resource
 import subprocess
-from typing import Optional
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
 
-from app import config, messages
-from app.entities import DebugData, TestsData
-from app.service import exceptions
-from app.service.entities import ExecuteResult, RustFile
-from app.utils import clean_str, clean_error
+from app import config, messages, metrics
+from app.entities import CheckData, DebugData, Limits, TestData, TestsData
+from app.service import crates, exceptions
+from app.service.backends import get_backend
+from app.service.comparators import get_comparator
+from app.service.cache import (
+    ArtifactCache,
+    LRUCache,
+    Memo,
+    SharedArtifactCache,
+    make_key,
+    toolchain_version
+)
+from app.service.entities import ExecuteResult, RustFile, Usage
+from app.service.process import communicate
+from app.service.runner import RemoteProcess
+from app.service.scheduler import Scheduler
+from app.utils import clean_str, clean_error, clean_paths
 
 
 class RustService:
+
+    artifact_cache = ArtifactCache(
+        directory=config.ARTIFACT_CACHE_DIR,
+        max_size=config.ARTIFACT_CACHE_SIZE,
+    )
+    # Shared with the other instances, looked up after a local miss
+    shared_cache = SharedArtifactCache(
+        directory=config.SHARED_CACHE_DIR,
+        max_size=config.SHARED_CACHE_SIZE,
+    ) if config.SHARED_CACHE_DIR else None
+    checker_cache = LRUCache(maxsize=config.CHECKER_CACHE_SIZE)
+    result_cache = LRUCache(
+        maxbytes=config.RESULT_CACHE_SIZE,
+        sizeof=lambda res: 256 + len(res.result or '') + len(res.error or ''),
+    )
+    scheduler = Scheduler()
+    # Time limit outcomes depend on the host load, not only on the input
+    UNCACHED_ERRORS = (messages.MSG_1, messages.MSG_13, messages.MSG_14)
+
     @staticmethod
-    def _drop_privileges():
+    def _drop_privileges(cpu_timeout: Optional[float] = None):
         def _fn():
+            if cpu_timeout:
+                # SIGXCPU at the soft limit, SIGKILL a second later
+                soft = math.ceil(cpu_timeout)
+                resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
             os.setgid(config.SANDBOX_USER_UID)
             os.setuid(config.SANDBOX_USER_UID)
         return _fn
 
     @classmethod
-    def _compile(cls, file: RustFile) -> Optional[str]:
+    def _compile(cls, file: RustFile, check_only: bool = False) -> Optional[str]:
+        backend = get_backend(config.COMPILE_BACKEND)
         proc = subprocess.Popen(
-            ["cargo", "build", "--release", "--quiet"],
+            backend.check_command(file) if check_only else backend.command(file),
             cwd=file.project_dir,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
         )
         try:
-            _, err = proc.communicate(timeout=config.TIMEOUT)
+            _, err = proc.communicate(timeout=config.COMPILE_TIMEOUT)
         except subprocess.TimeoutExpired:
             err = messages.MSG_RUST_COMPILE_TIMEOUT
         except Exception as ex:  # pragma: no cover
@@ -41,33 +84,254 @@ class RustService:
             return None
         return err
 
+    @staticmethod
+    def _limits(limits: Optional[Limits] = None) -> Limits:
+        limits = limits or Limits()
+        return Limits(
+            timeout=limits.timeout or config.TIMEOUT,
+            cpu_timeout=limits.cpu_timeout or config.CPU_TIMEOUT,
+            request_timeout=limits.request_timeout or config.REQUEST_TIMEOUT,
+        )
 
     @classmethod
-    def _execute(cls, file: RustFile, data_in: Optional[str] = None) -> ExecuteResult:
-        env = os.environ.copy()
-        env["RUST_BACKTRACE"] = "0"
+    def _build_key(cls, file: RustFile) -> str:
+        return make_key(
+            file.code,
+            file.manifest,
+            toolchain_version(),
+            get_backend(config.COMPILE_BACKEND).name,
+            file.profile,
+            crates.fingerprint(),
+        )
 
-        if isinstance(data_in, str) and "\n" in data_in:
-            data_in = data_in.replace("\n", " ")
+    @classmethod
+    def _build(cls, file: RustFile) -> Optional[str]:
+        if not config.ARTIFACT_CACHE_ENABLED:
+            return cls._compile_counted(file)
 
-        proc = subprocess.Popen(
+        key = cls._build_key(file)
+        if (cached := cls._restore(key, file))[0]:
+            return cached[1]
+
+        # Identical builds in other threads and workers wait for this one
+        # and take its binary or compile error from the cache
+        with cls.artifact_cache.flight(key) as waited:
+            if waited and (cached := cls._restore(key, file))[0]:
+                metrics.ARTIFACT_CACHE.inc(result='coalesced')
+                return cached[1]
+            err = cls._compile_counted(file)
+            cls._store(key, file, err)
+        return err
+
+    @classmethod
+    def _restore(cls, key: str, file: RustFile) -> Tuple[bool, Optional[str]]:
+        """(found, compile error) of a cached build, the binary is put in place."""
+        if (err := cls.artifact_cache.restore_error(key)) is not None:
+            return True, err
+        if cls.artifact_cache.restore(key, file.filepath_out):
+            return True, None
+        if cls.shared_cache is None:
+            return False, None
+        if (err := cls.shared_cache.restore_error(key)) is not None:
+            cls.artifact_cache.store_error(key, err)
+            return True, err
+        if cls.shared_cache.restore(key, file.filepath_out):
+            cls.artifact_cache.store(key, file.filepath_out)
+            return True, None
+        return False, None
+
+    @classmethod
+    def _store(cls, key: str, file: RustFile, err: Optional[str]):
+        if err == messages.MSG_RUST_COMPILE_TIMEOUT:
+            pass  # may succeed on a less loaded host, not cached
+        elif err:
+            cls.artifact_cache.store_error(key, err)
+            if cls.shared_cache is not None:
+                cls.shared_cache.store_error(key, err)
+        else:
+            cls.artifact_cache.store(key, file.filepath_out)
+            if cls.shared_cache is not None:
+                cls.shared_cache.store(key, file.filepath_out)
+
+    @classmethod
+    def _compile_counted(cls, file: RustFile) -> Optional[str]:
+        with cls.scheduler.compile_slot(), metrics.STAGE_DURATION.time(stage='compile'):
+            err = cls._compile(file)
+        cls._count_compile_error(err)
+        return err
+
+    @staticmethod
+    def _count_compile_error(err: Optional[str]):
+        if err == messages.MSG_RUST_COMPILE_TIMEOUT:
+            metrics.TIMEOUTS.inc(stage='compile')
+        elif err:
+            metrics.COMPILE_ERRORS.inc()
+
+    @classmethod
+    def _typecheck(cls, file: RustFile) -> Optional[str]:
+        with cls.scheduler.compile_slot(), metrics.STAGE_DURATION.time(stage='check'):
+            err = cls._compile(file, check_only=True)
+        cls._count_compile_error(err)
+        return err
+
+    @classmethod
+    def _run(
+        cls,
+        file: RustFile,
+        data_in: Optional[str] = None,
+        limits: Optional[Limits] = None,
+        deadline: Optional[float] = None,
+    ) -> ExecuteResult:
+        limits, by_budget = cls._clip(limits or cls._limits(), deadline)
+        if limits is None:
+            return ExecuteResult(result=None, error=messages.MSG_14)
+
+        with cls.scheduler.exec_slot(), metrics.STAGE_DURATION.time(stage='execute'):
+            exec_res = cls._execute(file=file, data_in=data_in, limits=limits)
+        return cls._count_run(exec_res, by_budget)
+
+    @staticmethod
+    def _clip(limits: Limits, deadline: Optional[float]) -> Tuple[Optional[Limits], bool]:
+        """Limits cut to what is left of the request budget, None once it
+        is spent; the flag tells if the wall limit was cut."""
+        if deadline is None:
+            return limits, False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None, False
+        if remaining < limits.timeout:
+            return replace(limits, timeout=remaining), True
+        return limits, False
+
+    @staticmethod
+    def _count_run(exec_res: ExecuteResult, by_budget: bool) -> ExecuteResult:
+        if exec_res.error == messages.MSG_1:
+            metrics.TIMEOUTS.inc(stage='execute')
+            if by_budget:
+                exec_res = exec_res._replace(error=messages.MSG_14)
+        elif exec_res.error == messages.MSG_13:
+            metrics.TIMEOUTS.inc(stage='cpu')
+        elif exec_res.error == messages.MSG_RUST_PANIC:
+            metrics.PANICS.inc()
+        return exec_res
+
+    @classmethod
+    def _spawn(cls, file: RustFile, limits: Limits):
+        if config.RUNNER_ENABLED:
+            try:
+                return RemoteProcess([file.filepath_out], cpu_timeout=limits.cpu_timeout)
+            except OSError as ex:
+                raise exceptions.ExecutionException(details=str(ex))
+
+        env = os.environ.copy()
+        env["RUST_BACKTRACE"] = "0"
+        return subprocess.Popen(
             [file.filepath_out],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            preexec_fn=cls._drop_privileges(),
+            preexec_fn=cls._drop_privileges(cpu_timeout=limits.cpu_timeout),
             env=env,
-            text=True,
         )
+
+    @classmethod
+    def _run_cached(
+        cls,
+        file: RustFile,
+        data_in: Optional[str] = None,
+        limits: Optional[Limits] = None,
+        deadline: Optional[float] = None,
+        no_cache: bool = False,
+    ) -> ExecuteResult:
+        if no_cache or not config.RESULT_CACHE_ENABLED:
+            return cls._run(file=file, data_in=data_in, limits=limits, deadline=deadline)
+
+        key = cls._result_key(file, data_in, limits or cls._limits())
+        if (exec_res := cls.result_cache.get(key)) is not None:
+            metrics.RESULT_CACHE.inc(result='hits')
+            return exec_res
+
+        metrics.RESULT_CACHE.inc(result='misses')
+        exec_res = cls._run(file=file, data_in=data_in, limits=limits, deadline=deadline)
+        if exec_res.error not in cls.UNCACHED_ERRORS:
+            cls.result_cache.put(key, exec_res)
+        return exec_res
+
+    @classmethod
+    def _result_key(cls, file: RustFile, data_in: Optional[str], limits: Limits) -> str:
+        return make_key(
+            cls._build_key(file),
+            data_in or '',
+            str(limits.timeout),
+            str(limits.cpu_timeout),
+            str(config.OUTPUT_LIMIT),
+        )
+
+    @classmethod
+    def _execute(
+        cls,
+        file: RustFile,
+        data_in: Optional[str] = None,
+        limits: Optional[Limits] = None,
+    ) -> ExecuteResult:
+        limits = limits or cls._limits()
+        if isinstance(data_in, str) and "\n" in data_in:
+            data_in = data_in.replace("\n", " ")
+
+        start = time.perf_counter()
+        proc = cls._spawn(file, limits)
         try:
-            out, err = proc.communicate(input=data_in, timeout=config.TIMEOUT)
+            out, err, truncated = communicate(
+                proc,
+                input=data_in,
+                timeout=limits.timeout,
+                limit=config.OUTPUT_LIMIT,
+            )
         except subprocess.TimeoutExpired:
-            return ExecuteResult(result=None, error=messages.MSG_1)
+            return cls._timeout_result(wall_time=time.perf_counter() - start)
         except Exception as ex:
             raise exceptions.ExecutionException(details=str(ex))
         finally:
             proc.kill()
 
+        return cls._execute_result(
+            proc, out, err, truncated, limits,
+            wall_time=time.perf_counter() - start
+        )
+
+    @staticmethod
+    def _timeout_result(wall_time: float) -> ExecuteResult:
+        usage = Usage(wall_time=wall_time, cpu_time=None, max_rss=None)
+        return ExecuteResult(result=None, error=messages.MSG_1, usage=usage)
+
+    @classmethod
+    def _execute_result(
+        cls,
+        proc,
+        out: str,
+        err: str,
+        truncated: bool,
+        limits: Limits,
+        wall_time: float,
+    ) -> ExecuteResult:
+        usage = cls._usage(proc, wall_time=wall_time)
+        if truncated:
+            return ExecuteResult(
+                result=clean_str(out or None),
+                error=messages.MSG_12,
+                usage=usage
+            )
+        rc = getattr(proc, "returncode", 0)
+        if rc == -signal.SIGXCPU or (
+            rc == -signal.SIGKILL
+            and (usage.cpu_time or 0) >= limits.cpu_timeout
+        ):
+            return ExecuteResult(
+                result=clean_str(out or None),
+                error=messages.MSG_13,
+                usage=usage
+            )
+
         err_clean = cls._strip_backtrace(err)
         err_final = clean_error(err_clean or None)
 
@@ -79,7 +343,18 @@ class RustService:
         else:
             out_final = clean_str(out or None)
 
-        return ExecuteResult(result=out_final, error=err_final)
+        return ExecuteResult(result=out_final, error=err_final, usage=usage)
+
+    @staticmethod
+    def _usage(proc: subprocess.Popen, wall_time: float) -> Usage:
+        rusage = getattr(proc, "rusage", None)
+        if rusage is None:
+            return Usage(wall_time=wall_time, cpu_time=None, max_rss=None)
+        return Usage(
+            wall_time=wall_time,
+            cpu_time=rusage.ru_utime + rusage.ru_stime,
+            max_rss=rusage.ru_maxrss,
+        )
 
 
     @staticmethod
@@ -107,36 +382,138 @@ class RustService:
 
     @classmethod
     def debug(cls, data: DebugData) -> DebugData:
-        rust = RustFile(data.code)
+        with cls.scheduler.admit():
+            limits = cls._limits(data.limits)
+            deadline = time.monotonic() + limits.request_timeout
+            with metrics.STAGE_DURATION.time(stage='setup'):
+                rust = RustFile(data.code, profile=data.profile or config.DEBUG_PROFILE)
 
-        if (err := cls._compile(rust)):
-            data.error = err
-        else:
-            exec_res = cls._execute(file=rust, data_in=data.data_in)
-            data.result, data.error = exec_res.result, exec_res.error
+            if data.check_only:
+                data.error = cls._typecheck(rust)
+            elif (err := cls._build(rust)):
+                data.error = err
+            else:
+                exec_res = cls._run_cached(
+                    file=rust,
+                    data_in=data.data_in,
+                    limits=limits,
+                    deadline=deadline,
+                    no_cache=data.no_cache,
+                )
+                data.result, data.error = exec_res.result, exec_res.error
+                if data.stats and exec_res.usage:
+                    data.wall_time, data.cpu_time, data.max_rss = exec_res.usage
 
-        rust.remove()
+            with metrics.STAGE_DURATION.time(stage='cleanup'):
+                rust.remove()
         return data
 
     @classmethod
-    def testing(cls, data: TestsData) -> TestsData:
-        rust = RustFile(data.code)
-        compile_err = cls._compile(rust)
+    def check(cls, data: CheckData) -> CheckData:
+        with cls.scheduler.admit():
+            with metrics.STAGE_DURATION.time(stage='setup'):
+                rust = RustFile(data.code)
+            err = cls._typecheck(rust)
+            with metrics.STAGE_DURATION.time(stage='cleanup'):
+                rust.remove()
 
-        for test in data.tests:
+        data.ok = err is None
+        data.details = clean_paths(err, rust.project_dir)
+        data.error = clean_error(data.details)
+        return data
+
+    @classmethod
+    def _run_test(
+        cls,
+        file: RustFile,
+        data: TestsData,
+        test: TestData,
+        limits: Optional[Limits] = None,
+        deadline: Optional[float] = None,
+        memo: Optional[Memo] = None,
+    ) -> TestData:
+        def run() -> ExecuteResult:
+            return cls._run_cached(
+                file=file,
+                data_in=test.data_in,
+                limits=limits,
+                deadline=deadline,
+                no_cache=data.no_cache,
+            )
+
+        # Tests with the same input share one run, unless the program
+        # may be non-deterministic
+        exec_res = run() if memo is None else memo.get(test.data_in, run)
+        return cls._grade(data, test, exec_res)
+
+    @classmethod
+    def _grade(cls, data: TestsData, test: TestData, exec_res: ExecuteResult) -> TestData:
+        test.result, test.error = exec_res.result, exec_res.error
+        if data.stats and exec_res.usage:
+            test.wall_time, test.cpu_time, test.max_rss = exec_res.usage
+        with metrics.STAGE_DURATION.time(stage='checker'):
+            if data.comparator:
+                test.ok = cls._compare(
+                    comparator=data.comparator,
+                    right_value=test.data_out,
+                    value=test.result,
+                )
+            else:
+                test.ok = cls._check(
+                    checker_func=data.checker,
+                    right_value=test.data_out,
+                    value=test.result,
+                )
+        return test
+
+    @classmethod
+    def testing(
+        cls,
+        data: TestsData,
+        on_compile: Optional[Callable[[Optional[str]], None]] = None,
+        on_test: Optional[Callable[[int, TestData], None]] = None,
+    ) -> TestsData:
+        with cls.scheduler.admit():
+            return cls._testing(data, on_compile=on_compile, on_test=on_test)
+
+    @classmethod
+    def _testing(
+        cls,
+        data: TestsData,
+        on_compile: Optional[Callable[[Optional[str]], None]] = None,
+        on_test: Optional[Callable[[int, TestData], None]] = None,
+    ) -> TestsData:
+        limits = cls._limits(data.limits)
+        deadline = time.monotonic() + limits.request_timeout
+        with metrics.STAGE_DURATION.time(stage='setup'):
+            rust = RustFile(data.code, profile=data.profile or config.TESTING_PROFILE)
+        compile_err = cls._typecheck(rust) if data.check_only else cls._build(rust)
+        if on_compile:
+            on_compile(compile_err)
+
+        memo = None if data.no_cache else Memo()
+
+        def run_test(index: int):
+            test = data.tests[index]
             if compile_err:
                 test.error, test.ok = compile_err, False
-                continue
+            elif not data.check_only:
+                cls._run_test(rust, data, test, limits, deadline, memo)
+            if on_test:
+                on_test(index, test)
 
-            exec_res = cls._execute(file=rust, data_in=test.data_in)
-            test.result, test.error = exec_res.result, exec_res.error
-            test.ok = cls._check(
-                checker_func=data.checker,
-                right_value=test.data_out,
-                value=test.result,
-            )
+        indexes = range(len(data.tests))
+        workers = min(config.TEST_WORKERS, len(data.tests))
+        if not compile_err and not data.check_only and workers > 1:
+            # Tests share the compiled binary, results keep input order
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(run_test, indexes))
+        else:
+            for index in indexes:
+                run_test(index)
 
-        rust.remove()
+        with metrics.STAGE_DURATION.time(stage='cleanup'):
+            rust.remove()
         return data
 
     @classmethod
@@ -157,16 +534,33 @@ class RustService:
             raise exceptions.CheckerException(message=messages.MSG_3)
         return fn
 
+    @classmethod
+    def _get_checker(cls, checker_func: str):
+        key = make_key(checker_func)
+        fn = cls.checker_cache.get(key)
+        if fn is None:
+            fn = cls._validate_checker_func(checker_func)
+            cls.checker_cache.put(key, fn)
+        return fn
+
     @classmethod
     def _check(cls, checker_func: str, **checker_func_vars) -> bool:
-        fn = cls._validate_checker_func(checker_func)
         try:
-            result = fn(**checker_func_vars)
-        except Exception as ex:
-            raise exceptions.CheckerException(
-                message=messages.MSG_4,
-                details=str(ex)
-            )
-        if not isinstance(result, bool):
-            raise exceptions.CheckerException(message=messages.MSG_4)
+            fn = cls._get_checker(checker_func)
+            try:
+                result = fn(**checker_func_vars)
+            except Exception as ex:
+                raise exceptions.CheckerException(
+                    message=messages.MSG_4,
+                    details=str(ex)
+                )
+            if not isinstance(result, bool):
+                raise exceptions.CheckerException(message=messages.MSG_4)
+        except exceptions.CheckerException:
+            metrics.CHECKER_ERRORS.inc()
+            raise
         return result
+
+    @classmethod
+    def _compare(cls, comparator: str, right_value: Optional[str], value: Optional[str]) -> bool:
+        return get_comparator(comparator)(right_value, value)
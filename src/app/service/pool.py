@@ -0,0 +1,106 @@
+import os
+import uuid
+import atexit
+import queue
+import shutil
+import threading
+
+from app import config
+
+
+class ProjectPool:
+
+    """Ready-to-use project skeletons (manifest written, target dir created).
+
+    Requests check directories out with acquire() and hand them back with
+    release(); recycling and refilling run in a background thread. The
+    thread is started lazily per process, so the pool survives forking
+    by gunicorn.
+    """
+
+    def __init__(self, size: int, manifest: str):
+        self.size = size
+        self.manifest = manifest
+        self._lock = threading.Lock()
+        self._pid = None
+        self._ready: queue.Queue = queue.Queue()
+        self._tasks: queue.Queue = queue.Queue()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Directories prepared by a parent process are not ours to reuse
+            self._ready = queue.Queue()
+            self._tasks = queue.Queue()
+            self._pid = os.getpid()
+            threading.Thread(target=self._maintain, daemon=True).start()
+            atexit.register(self._drain)
+            self._tasks.put(None)
+
+    def _drain(self):
+        while True:
+            try:
+                project_dir = self._ready.get_nowait()
+            except queue.Empty:
+                return
+            shutil.rmtree(project_dir, ignore_errors=True)
+
+    def _create(self) -> str:
+        file_id = str(uuid.uuid4()).replace('-', '_')
+        project_dir = os.path.join(
+            config.SANDBOX_DIR,
+            f"sandbox_proj_{file_id}"
+        )
+        os.makedirs(os.path.join(project_dir, 'src'))
+        os.makedirs(os.path.join(project_dir, 'target', 'release'))
+        with open(os.path.join(project_dir, 'Cargo.toml'), 'w') as manifest:
+            manifest.write(self.manifest)
+        return project_dir
+
+    def _recycle(self, project_dir: str):
+        # target/ is dropped entirely: cached binaries are hard links and
+        # must never be overwritten in place by the next build
+        target_dir = os.path.join(project_dir, 'target')
+        shutil.rmtree(target_dir, ignore_errors=True)
+        try:
+            os.remove(os.path.join(project_dir, 'src', 'main.rs'))
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.join(target_dir, 'release'))
+
+    def _maintain(self):
+        while True:
+            project_dir = self._tasks.get()
+            try:
+                if project_dir is not None:
+                    if self._ready.qsize() < self.size:
+                        self._recycle(project_dir)
+                        self._ready.put(project_dir)
+                    else:
+                        shutil.rmtree(project_dir, ignore_errors=True)
+                while self._ready.qsize() < self.size:
+                    self._ready.put(self._create())
+            except OSError:
+                if project_dir is not None:
+                    shutil.rmtree(project_dir, ignore_errors=True)
+
+    def acquire(self) -> str:
+        if self.size <= 0:
+            return self._create()
+        self._ensure_started()
+        try:
+            project_dir = self._ready.get_nowait()
+        except queue.Empty:
+            return self._create()
+        self._tasks.put(None)
+        return project_dir
+
+    def release(self, project_dir: str):
+        if self.size <= 0:
+            shutil.rmtree(project_dir, ignore_errors=True)
+            return
+        self._ensure_started()
+        self._tasks.put(project_dir)
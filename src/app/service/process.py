@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import codecs
+import contextlib
+import select
+import selectors
+import subprocess
+from typing import Optional, Tuple
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Capture:
+
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.size = 0
+        self.truncated = False
+        self._parts = []
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.limit is not None and self.size + len(chunk) > self.limit:
+            chunk = chunk[:self.limit - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._parts.append(self._decoder.decode(chunk))
+        return not self.truncated
+
+    def text(self) -> str:
+        self._parts.append(self._decoder.decode(b'', final=True))
+        return ''.join(self._parts)
+
+
+def wait(proc: subprocess.Popen, timeout: Optional[float] = None) -> int:
+    """Popen.wait that reaps the child with wait4 and keeps its resource
+    usage in proc.rusage. Processes that are not our children (see
+    runner.RemoteProcess) wait for themselves."""
+    if not isinstance(proc, subprocess.Popen):
+        return proc.wait(timeout=timeout)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.0005
+    try:
+        while True:
+            flags = 0 if deadline is None else os.WNOHANG
+            pid, status, rusage = os.wait4(proc.pid, flags)
+            if pid == proc.pid:
+                break
+            if time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(proc.args, timeout)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+    except ChildProcessError:
+        return proc.wait(timeout=timeout)
+
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+    proc.rusage = rusage
+    return proc.returncode
+
+
+def communicate(
+    proc: subprocess.Popen,
+    input: Optional[str] = None,
+    timeout: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, str, bool]:
+    """Popen.communicate for binary pipes with a byte cap per stream.
+
+    Output is read incrementally and decoded as UTF-8 on the fly; once a
+    stream exceeds `limit` bytes the process is killed and the captured
+    prefix is returned with the truncated flag set. The child is reaped
+    with wait(), so proc.rusage is available afterwards. Raises
+    subprocess.TimeoutExpired like Popen.communicate.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    captures = {proc.stdout: _Capture(limit), proc.stderr: _Capture(limit)}
+    data = memoryview((input or '').encode())
+    offset = 0
+    truncated = False
+
+    with selectors.DefaultSelector() as selector:
+        if data:
+            selector.register(proc.stdin, selectors.EVENT_WRITE)
+        else:
+            proc.stdin.close()
+        for pipe in captures:
+            selector.register(pipe, selectors.EVENT_READ)
+
+        while selector.get_map() and not truncated:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired(proc.args, timeout)
+            for key, _ in selector.select(remaining):
+                if key.fileobj is proc.stdin:
+                    try:
+                        offset += os.write(key.fd, data[offset:offset + select.PIPE_BUF])
+                    except BrokenPipeError:
+                        offset = len(data)
+                    if offset >= len(data):
+                        selector.unregister(proc.stdin)
+                        proc.stdin.close()
+                    continue
+
+                chunk = os.read(key.fd, CHUNK_SIZE)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                elif not captures[key.fileobj].feed(chunk):
+                    truncated = True
+                    proc.kill()
+                    break
+
+    if not truncated:
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            wait(proc, timeout=remaining)
+        except subprocess.TimeoutExpired:
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+    else:
+        wait(proc)
+
+    for pipe in (proc.stdin, proc.stdout, proc.stderr):
+        if not pipe.closed:
+            pipe.close()
+    out, err = (capture.text() for capture in captures.values())
+    return out, err, truncated
+
+
+async def acommunicate(
+    proc,
+    input: Optional[str] = None,
+    timeout: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, str, bool]:
+    """communicate() for asyncio.subprocess.Process and
+    runner.AsyncRemoteProcess: same byte cap and truncation semantics,
+    raises subprocess.TimeoutExpired. The caller kills the process."""
+    captures = [_Capture(limit), _Capture(limit)]
+
+    async def feed():
+        if input:
+            proc.stdin.write(input.encode())
+            try:
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        proc.stdin.close()
+
+    async def read(stream, capture: _Capture) -> bool:
+        while chunk := await stream.read(CHUNK_SIZE):
+            if not capture.feed(chunk):
+                with contextlib.suppress(ProcessLookupError):
+                    proc.kill()
+                return True
+        return False
+
+    async def run() -> bool:
+        results = await asyncio.gather(
+            feed(),
+            read(proc.stdout, captures[0]),
+            read(proc.stderr, captures[1]),
+        )
+        await proc.wait()
+        return any(results[1:])
+
+    try:
+        truncated = await asyncio.wait_for(run(), timeout)
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(getattr(proc, 'args', None), timeout)
+    out, err = (capture.text() for capture in captures)
+    return out, err, truncated
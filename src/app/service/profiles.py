@@ -0,0 +1,52 @@
+from collections import namedtuple
+from typing import Dict, List
+
+
+Profile = namedtuple(
+    'Profile',
+    ('name', 'opt_level', 'codegen_units', 'panic', 'strip'),
+    defaults=(None, None, False)
+)
+
+DEFAULT_PROFILE = 'release'
+
+PROFILES: Dict[str, Profile] = {
+    # cargo defaults, what every submission was built with before profiles
+    'release': Profile('release', opt_level=3),
+    # snippets in /debug/: cheap codegen, no unwinding tables, no symbols
+    'fast-compile': Profile('fast-compile', opt_level=1, panic='abort', strip=True),
+    # CPU-heavy grading runs: one codegen unit lets LLVM optimise across the crate
+    'fast-run': Profile('fast-run', opt_level=3, codegen_units=1),
+}
+
+
+def get_profile(name: str) -> Profile:
+    return PROFILES.get(name, PROFILES[DEFAULT_PROFILE])
+
+
+def manifest_sections() -> str:
+    sections = []
+    for profile in PROFILES.values():
+        if profile.name == DEFAULT_PROFILE:
+            continue
+        lines = [f'[profile.{profile.name}]', 'inherits = "release"']
+        lines.append(f'opt-level = {profile.opt_level}')
+        if profile.codegen_units:
+            lines.append(f'codegen-units = {profile.codegen_units}')
+        if profile.panic:
+            lines.append(f'panic = "{profile.panic}"')
+        if profile.strip:
+            lines.append('strip = true')
+        sections.append('\n'.join(lines) + '\n')
+    return '\n'.join(sections)
+
+
+def rustc_flags(profile: Profile) -> List[str]:
+    flags = ['-C', f'opt-level={profile.opt_level}']
+    if profile.codegen_units:
+        flags += ['-C', f'codegen-units={profile.codegen_units}']
+    if profile.panic:
+        flags += ['-C', f'panic={profile.panic}']
+    if profile.strip:
+        flags += ['-C', 'strip=symbols']
+    return flags
@@ -0,0 +1,374 @@
+import os
+import sys
+import json
+import math
+import time
+import array
+import asyncio
+import fcntl
+import socket
+import signal
+import resource
+import threading
+import subprocess
+from collections import namedtuple
+from typing import List, Optional
+
+from app import config
+
+
+START_TIMEOUT = 5  # seconds
+
+RUsage = namedtuple('RUsage', ('ru_utime', 'ru_stime', 'ru_maxrss'))
+
+
+def _send(sock: socket.socket, message: dict, fds: Optional[List[int]] = None):
+    data = json.dumps(message).encode() + b'\n'
+    if fds:
+        sock.sendmsg(
+            [data],
+            [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))]
+        )
+    else:
+        sock.sendall(data)
+
+
+class _LineReader:
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._buffer = b''
+
+    def read(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next message or None when the peer closed the connection.
+        Raises socket.timeout, the buffer survives it."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b'\n' not in self._buffer:
+            self.sock.settimeout(
+                None if deadline is None else max(deadline - time.monotonic(), 0.001)
+            )
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+
+# Helper side
+
+
+def _recv_request(conn: socket.socket):
+    fds = array.array('i')
+    data, ancdata, _, _ = conn.recvmsg(
+        64 * 1024,
+        socket.CMSG_LEN(3 * fds.itemsize)
+    )
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+    return json.loads(data), list(fds)
+
+
+def _serve(conn: socket.socket, env: dict):
+    fds = []
+    try:
+        request, fds = _recv_request(conn)
+        proc = subprocess.Popen(
+            request['args'],
+            stdin=fds[0],
+            stdout=fds[1],
+            stderr=fds[2],
+            env=env,
+        )
+    except Exception as ex:
+        _send(conn, {'error': str(ex)})
+        conn.close()
+        return
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+    if request.get('cpu_timeout'):
+        soft = math.ceil(request['cpu_timeout'])
+        try:
+            # SIGXCPU at the soft limit, SIGKILL a second later
+            resource.prlimit(proc.pid, resource.RLIMIT_CPU, (soft, soft + 1))
+        except ProcessLookupError:
+            pass
+    _send(conn, {'pid': proc.pid})
+
+    lock, exited = threading.Lock(), []
+
+    def watch_kill():
+        reader = _LineReader(conn)
+        try:
+            while (message := reader.read()) is not None:
+                with lock:
+                    if message.get('kill') and not exited:
+                        proc.kill()
+        except OSError:
+            pass
+
+    threading.Thread(target=watch_kill, daemon=True).start()
+    # Wait without reaping first, so a kill never hits a recycled pid
+    os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+    with lock:
+        exited.append(True)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+    try:
+        _send(conn, {
+            'returncode': proc.returncode,
+            'rusage': [rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss],
+        })
+    except OSError:
+        pass
+    finally:
+        # shutdown() also wakes watch_kill blocked in recv()
+        conn.shutdown(socket.SHUT_RDWR)
+        conn.close()
+
+
+def serve(path: str, uid: int, idle_timeout: float):
+
+    """Accept run requests on the unix socket `path` as user `uid`.
+
+    The socket is created before privileges are dropped, so only the
+    owner of the web workers can connect to it. Exits after
+    `idle_timeout` seconds without requests.
+    """
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(128)
+    os.setgid(uid)
+    os.setuid(uid)
+
+    env = os.environ.copy()
+    env['RUST_BACKTRACE'] = '0'
+    server.settimeout(idle_timeout)
+    while True:
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            if threading.active_count() == 1:
+                break
+            continue
+        conn.settimeout(None)
+        threading.Thread(target=_serve, args=(conn, env), daemon=True).start()
+    server.close()
+
+
+# Web worker side
+
+
+class RemoteProcess:
+
+    """Popen look-alike for a program started by the runner.
+
+    Pipes are created here and their far ends are passed to the runner,
+    so process.communicate() works on it unchanged; wait() reports the
+    exit status and the resource usage measured by the runner.
+    """
+
+    def __init__(self, args: List[str], cpu_timeout: Optional[int] = None):
+        self.args = args
+        self.returncode = None
+        self.rusage = None
+        self.pid = None
+
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        try:
+            self._sock = _connect()
+            _send(
+                self._sock,
+                {'args': args, 'cpu_timeout': cpu_timeout},
+                fds=[stdin_r, stdout_w, stderr_w]
+            )
+            self._reader = _LineReader(self._sock)
+            reply = self._reader.read(timeout=START_TIMEOUT)
+            if reply is None:
+                reply = {'error': 'Runner closed the connection'}
+        except Exception:
+            for fd in (stdin_w, stdout_r, stderr_r):
+                os.close(fd)
+            raise
+        finally:
+            for fd in (stdin_r, stdout_w, stderr_w):
+                os.close(fd)
+
+        self.stdin = os.fdopen(stdin_w, 'wb', 0)
+        self.stdout = os.fdopen(stdout_r, 'rb', 0)
+        self.stderr = os.fdopen(stderr_r, 'rb', 0)
+        if 'error' in reply:
+            self._close()
+            raise OSError(reply['error'])
+        self.pid = reply['pid']
+
+    def _close(self):
+        self._sock.close()
+        for pipe in (self.stdin, self.stdout, self.stderr):
+            if not pipe.closed:
+                pipe.close()
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if self.returncode is not None:
+            return self.returncode
+        try:
+            reply = self._reader.read(timeout=timeout)
+        except socket.timeout:
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        self._sock.close()
+        if reply is None:
+            # The runner is gone, the exit status is lost with it
+            self.returncode = -signal.SIGKILL
+        else:
+            self.returncode = reply['returncode']
+            self.rusage = RUsage(*reply['rusage'])
+        return self.returncode
+
+    def kill(self):
+        if self.returncode is not None:
+            return
+        try:
+            _send(self._sock, {'kill': True})
+        except OSError:
+            pass
+        self.wait()
+
+
+class AsyncRemoteProcess:
+
+    """asyncio.subprocess.Process look-alike for a program started by the
+    runner: stdin/stdout/stderr are streams, wait() is a coroutine and
+    closes the pipes, read them first. Use create(), the handshake runs
+    in the default executor as it may have to start the runner."""
+
+    def __init__(self, remote: RemoteProcess, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, stdin: asyncio.StreamWriter,
+                 stdout: asyncio.StreamReader, stderr: asyncio.StreamReader,
+                 transports: List[asyncio.BaseTransport]):
+        self.args = remote.args
+        self.pid = remote.pid
+        self.returncode = None
+        self.rusage = None
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self._reader = reader
+        self._writer = writer
+        self._transports = transports
+
+    @classmethod
+    async def create(cls, args: List[str], cpu_timeout: Optional[int] = None):
+        loop = asyncio.get_running_loop()
+        remote = await loop.run_in_executor(None, RemoteProcess, args, cpu_timeout)
+        try:
+            reader, writer = await asyncio.open_unix_connection(sock=remote._sock)
+            if remote._reader._buffer:
+                reader.feed_data(remote._reader._buffer)
+            transport, protocol = await loop.connect_write_pipe(
+                asyncio.streams.FlowControlMixin, remote.stdin
+            )
+            stdin = asyncio.StreamWriter(transport, protocol, None, loop)
+            stdout, stdout_transport = await _pipe_reader(loop, remote.stdout)
+            stderr, stderr_transport = await _pipe_reader(loop, remote.stderr)
+        except Exception:
+            remote.kill()
+            remote._close()
+            raise
+        return cls(
+            remote, reader, writer, stdin, stdout, stderr,
+            transports=[transport, stdout_transport, stderr_transport]
+        )
+
+    async def wait(self) -> int:
+        if self.returncode is not None:
+            return self.returncode
+        line = await self._reader.readline()
+        self._writer.close()
+        for transport in self._transports:
+            transport.close()
+        if not line:
+            self.returncode = -signal.SIGKILL
+        else:
+            reply = json.loads(line)
+            self.returncode = reply['returncode']
+            self.rusage = RUsage(*reply['rusage'])
+        return self.returncode
+
+    def kill(self):
+        if self.returncode is None and not self._writer.is_closing():
+            self._writer.write(json.dumps({'kill': True}).encode() + b'\n')
+
+
+async def _pipe_reader(loop: asyncio.AbstractEventLoop, pipe):
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe
+    )
+    return reader, transport
+
+
+_start_lock = threading.Lock()
+
+
+def _try_connect() -> Optional[socket.socket]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(config.RUNNER_SOCKET)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def _connect() -> socket.socket:
+    sock = _try_connect()
+    if sock is not None:
+        return sock
+
+    # Every worker may find the runner missing, one of them starts it
+    with _start_lock, open(config.RUNNER_SOCKET + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sock = _try_connect()
+        if sock is not None:
+            return sock
+        if os.path.exists(config.RUNNER_SOCKET):
+            os.unlink(config.RUNNER_SOCKET)
+        start()
+
+        deadline = time.monotonic() + START_TIMEOUT
+        while (sock := _try_connect()) is None:
+            if time.monotonic() >= deadline:
+                raise OSError('Runner did not start')
+            time.sleep(0.01)
+    return sock
+
+
+def start() -> subprocess.Popen:
+    src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [src_dir, env.get('PYTHONPATH')]))
+    return subprocess.Popen(
+        [
+            sys.executable, '-m', 'app.service.runner',
+            config.RUNNER_SOCKET,
+            str(config.SANDBOX_USER_UID),
+            str(config.RUNNER_IDLE_TIMEOUT),
+        ],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1], int(sys.argv[2]), float(sys.argv[3]))
@@ -0,0 +1,110 @@
+import os
+import time
+import asyncio
+import fcntl
+import random
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from app import config
+from app.service import exceptions
+
+
+POLL_INTERVAL = 0.05  # seconds
+
+
+class SlotPool:
+
+    """Counting semaphore built on flock'ed slot files in SCHEDULER_DIR.
+
+    Slots are shared by every thread and process on the host that uses
+    the same directory, and are released by the kernel if a worker dies.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+    def _try_acquire(self) -> Optional[int]:
+        os.makedirs(config.SCHEDULER_DIR, exist_ok=True)
+        start = random.randrange(self.size)
+        for offset in range(self.size):
+            path = os.path.join(
+                config.SCHEDULER_DIR,
+                f"{self.name}.{(start + offset) % self.size}.lock"
+            )
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+    @contextmanager
+    def slot(self, timeout: float = 0):
+        if self.size <= 0:
+            yield
+            return
+
+        deadline = time.monotonic() + timeout
+        while (fd := self._try_acquire()) is None:
+            if time.monotonic() >= deadline:
+                raise exceptions.OverloadedException()
+            time.sleep(POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            os.close(fd)
+
+    @asynccontextmanager
+    async def aslot(self, timeout: float = 0):
+        """slot() for coroutines, waits without blocking the event loop."""
+        if self.size <= 0:
+            yield
+            return
+
+        deadline = time.monotonic() + timeout
+        while (fd := self._try_acquire()) is None:
+            if time.monotonic() >= deadline:
+                raise exceptions.OverloadedException()
+            await asyncio.sleep(POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            os.close(fd)
+
+
+class Scheduler:
+
+    """Admission control in front of the compile and execution slots.
+
+    admit() never waits: a request is rejected right away once
+    COMPILE_SLOTS + SCHEDULER_QUEUE_SIZE requests are in flight. Admitted
+    requests then wait up to SCHEDULER_WAIT_TIMEOUT for each slot.
+    """
+
+    def __init__(self):
+        self.requests = SlotPool(
+            'request',
+            config.COMPILE_SLOTS + config.SCHEDULER_QUEUE_SIZE
+            if config.COMPILE_SLOTS > 0 else 0
+        )
+        self.compile = SlotPool('compile', config.COMPILE_SLOTS)
+        self.execute = SlotPool('execute', config.EXEC_SLOTS)
+
+    def admit(self):
+        return self.requests.slot()
+
+    def compile_slot(self):
+        return self.compile.slot(timeout=config.SCHEDULER_WAIT_TIMEOUT)
+
+    def exec_slot(self):
+        return self.execute.slot(timeout=config.SCHEDULER_WAIT_TIMEOUT)
+
+    def acompile_slot(self):
+        return self.compile.aslot(timeout=config.SCHEDULER_WAIT_TIMEOUT)
+
+    def aexec_slot(self):
+        return self.execute.aslot(timeout=config.SCHEDULER_WAIT_TIMEOUT)
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def artifact_cache(mocker):
+    # Unit tests compile from scratch unless a test opts in to the cache
+    mocker.patch("app.config.ARTIFACT_CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def runner(mocker):
+    # Programs are spawned in-process unless a test opts in to the runner
+    mocker.patch("app.config.RUNNER_ENABLED", False)
@@ -0,0 +1,237 @@
+import sys
+import asyncio
+import subprocess
+
+import pytest
+
+from app import messages
+from app.entities import CheckData, DebugData, Limits, TestData, TestsData
+from app.service import exceptions
+from app.service.aio import AsyncRustService
+from app.service.cache import AsyncMemo
+from app.service.process import acommunicate
+from app.service.runner import AsyncRemoteProcess
+from app.service.scheduler import SlotPool
+
+
+ECHO_LEN = """
+fn main() {
+    let mut s = String::new();
+    std::io::stdin().read_line(&mut s).unwrap();
+    println!("{}", s.trim().len());
+}"""
+CHECKER = "def checker(right_value, value):\n    return right_value == value"
+
+
+async def _python(code: str):
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-c", code,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def test_acommunicate__echo_input__ok():
+    # arrange
+    code = "import sys; print(sys.stdin.read()[::-1]); print('e', file=sys.stderr)"
+
+    async def run():
+        proc = await _python(code)
+        return await acommunicate(proc, input="abc", timeout=5)
+
+    # act
+    result = asyncio.run(run())
+
+    # assert
+    assert result == ("cba\n", "e\n", False)
+
+
+def test_acommunicate__output_limit__killed_and_truncated():
+    # arrange
+    async def run():
+        proc = await _python("while True: print('x' * 1000)")
+        return await acommunicate(proc, timeout=5, limit=10_000), proc.returncode
+
+    # act
+    (out, _, truncated), returncode = asyncio.run(run())
+
+    # assert
+    assert truncated is True
+    assert len(out) == 10_000
+    assert returncode == -9
+
+
+def test_acommunicate__timeout__raise_exception():
+    # arrange
+    async def run():
+        proc = await _python("import time; time.sleep(30)")
+        try:
+            await acommunicate(proc, timeout=0.2)
+        finally:
+            proc.kill()
+            await proc.wait()
+
+    # act / assert
+    with pytest.raises(subprocess.TimeoutExpired):
+        asyncio.run(run())
+
+
+def test_aslot__busy__waiter_acquired_after_release(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SCHEDULER_DIR", str(tmp_path))
+    pool = SlotPool("execute", 1)
+    order = []
+
+    async def hold():
+        async with pool.aslot():
+            order.append("held")
+            await asyncio.sleep(0.1)
+        order.append("released")
+
+    async def wait():
+        await asyncio.sleep(0.01)
+        async with pool.aslot(timeout=5):
+            order.append("acquired")
+
+    async def run():
+        await asyncio.gather(hold(), wait())
+
+    # act
+    asyncio.run(run())
+
+    # assert
+    assert order == ["held", "released", "acquired"]
+
+
+def test_aslot__busy_no_wait__raise_exception(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SCHEDULER_DIR", str(tmp_path))
+    pool = SlotPool("compile", 1)
+
+    async def run():
+        async with pool.aslot():
+            async with pool.aslot():
+                pass
+
+    # act / assert
+    with pytest.raises(exceptions.OverloadedException):
+        asyncio.run(run())
+
+
+def test_async_memo__concurrent_same_key__called_once():
+    # arrange
+    memo = AsyncMemo()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(memo.get("key", fn), memo.get("key", fn))
+
+    # act
+    results = asyncio.run(run())
+
+    # assert
+    assert results == ["value", "value"]
+    assert len(calls) == 1
+
+
+def test_async_remote_process__communicate__ok(mocker, tmp_path):
+    # arrange
+    mocker.patch("app.config.RUNNER_SOCKET", str(tmp_path / "runner.sock"))
+    mocker.patch("app.config.RUNNER_IDLE_TIMEOUT", 1)
+
+    async def run():
+        proc = await AsyncRemoteProcess.create(
+            [sys.executable, "-c", "import sys; print(sys.stdin.read().upper())"]
+        )
+        return await acommunicate(proc, input="abc", timeout=5), proc
+
+    # act
+    result, proc = asyncio.run(run())
+
+    # assert
+    assert result == ("ABC\n", "", False)
+    assert proc.returncode == 0
+    assert proc.rusage.ru_maxrss > 0
+
+
+def test_debug__concurrent__ok():
+    # arrange
+    requests = [DebugData(code=ECHO_LEN, data_in="x" * i) for i in range(3)]
+
+    async def run():
+        return await asyncio.gather(*(AsyncRustService.debug(data) for data in requests))
+
+    # act
+    results = asyncio.run(run())
+
+    # assert
+    assert [(data.result, data.error) for data in results] == [
+        ("0", None), ("1", None), ("2", None)
+    ]
+
+
+def test_debug__compile_error__error():
+    # arrange
+    data = DebugData(code="fn main() { let x: u8 = \"a\"; }")
+
+    # act
+    result = asyncio.run(AsyncRustService.debug(data))
+
+    # assert
+    assert result.result is None
+    assert "mismatched types" in result.error
+
+
+def test_debug__timeout__error():
+    # arrange
+    data = DebugData(
+        code="fn main() { loop {} }",
+        limits=Limits(timeout=0.5, cpu_timeout=5),
+    )
+
+    # act
+    result = asyncio.run(AsyncRustService.debug(data))
+
+    # assert
+    assert result.error == messages.MSG_1
+
+
+def test_check__type_error__not_ok():
+    # arrange
+    data = CheckData(code="fn main() { let x: u8 = \"a\"; }")
+
+    # act
+    result = asyncio.run(AsyncRustService.check(data))
+
+    # assert
+    assert result.ok is False
+    assert "E0308" in result.details
+
+
+def test_testing__same_input__executed_once(mocker):
+    # arrange
+    execute = mocker.spy(AsyncRustService, "_execute")
+    data = TestsData(
+        code=ECHO_LEN,
+        checker=CHECKER,
+        tests=[
+            TestData(data_in="ab", data_out="2"),
+            TestData(data_in="abc", data_out="2"),
+            TestData(data_in="ab", data_out="2"),
+        ],
+    )
+
+    # act
+    result = asyncio.run(AsyncRustService.testing(data))
+
+    # assert
+    assert [(test.result, test.ok) for test in result.tests] == [
+        ("2", True), ("3", False), ("2", True)
+    ]
+    assert execute.call_count == 2
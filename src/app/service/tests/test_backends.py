@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from app import messages
+from app.service.main import RustService
+from app.service.entities import RustFile
+from app.service.backends import CargoBackend, RustcBackend, get_backend
+from app.service.profiles import PROFILES
+
+
+def test_get_backend__unknown__cargo():
+    assert isinstance(get_backend("unknown"), CargoBackend)
+
+
+def test_get_backend__executable_missing__fallback_to_cargo(mocker):
+    # arrange
+    mocker.patch("app.service.backends.shutil.which", return_value=None)
+
+    # act
+    backend = get_backend("rustc")
+
+    # assert
+    assert isinstance(backend, CargoBackend)
+
+
+@pytest.mark.parametrize("backend", [CargoBackend.name, RustcBackend.name])
+def test_compile__backend__ok(backend, mocker):
+    # arrange
+    mocker.patch("app.config.COMPILE_BACKEND", backend)
+    file = RustFile('fn main() { println!("{}", 6 * 7); }')
+
+    # act
+    error = RustService._compile(file)
+    exec_result = RustService._execute(file=file)
+
+    # assert
+    assert error is None
+    assert exec_result.result == "42"
+    file.remove()
+
+
+@pytest.mark.parametrize("backend", [CargoBackend.name, RustcBackend.name])
+def test_compile__check_only__no_binary(backend, mocker):
+    # arrange
+    mocker.patch("app.config.COMPILE_BACKEND", backend)
+    file = RustFile('fn main() { let x: i32 = "a"; }')
+
+    # act
+    error = RustService._compile(file, check_only=True)
+
+    # assert
+    assert "error[E0308]" in error
+    assert not os.path.exists(file.filepath_out)
+    file.remove()
+
+
+@pytest.mark.parametrize("backend", [CargoBackend.name, RustcBackend.name])
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_compile__profile__ok(backend, profile, mocker):
+    # arrange
+    mocker.patch("app.config.COMPILE_BACKEND", backend)
+    file = RustFile('fn main() { println!("{}", 6 * 7); }', profile=profile)
+
+    # act
+    error = RustService._compile(file)
+    exec_result = RustService._execute(file=file)
+
+    # assert
+    assert error is None
+    assert exec_result.result == "42"
+    assert file.filepath_out.endswith(f"/target/{profile}/{file.package_name}")
+    file.remove()
+
+
+def test_execute__panic_abort_profile__panic_detected():
+    # arrange
+    file = RustFile('fn main() { panic!("boom"); }', profile="fast-compile")
+    RustService._compile(file)
+
+    # act
+    exec_result = RustService._execute(file=file)
+
+    # assert
+    assert exec_result.error == messages.MSG_RUST_PANIC
+    file.remove()
+
+
+def test_build_key__profile__differs(mocker):
+    # arrange
+    file = RustFile('fn main() {}', profile="fast-compile")
+    other = RustFile('fn main() {}', profile="fast-run")
+
+    # act
+    keys = {RustService._build_key(file), RustService._build_key(other)}
+
+    # assert
+    assert len(keys) == 2
+    file.remove()
+    other.remove()
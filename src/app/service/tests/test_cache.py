@@ -0,0 +1,324 @@
+import os
+import fcntl
+import threading
+
+import pytest
+
+from app import messages
+from app.service.main import RustService
+from app.service.cache import ArtifactCache, LRUCache, Memo, SharedArtifactCache, make_key
+from app.service.entities import RustFile
+
+
+def _write(path, content=b"binary"):
+    with open(path, "wb") as file:
+        file.write(content)
+    return path
+
+
+def test_make_key__parts_boundary__differs():
+    assert make_key("ab", "c") != make_key("a", "bc")
+    assert make_key("a", "b") == make_key("a", "b")
+
+
+def test_artifact_cache__store_restore__hit(tmp_path):
+    # arrange
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_size=1024)
+    binary = _write(str(tmp_path / "bin"))
+    restored = str(tmp_path / "project" / "target" / "release" / "bin")
+
+    # act
+    miss = cache.restore("key", restored)
+    cache.store("key", binary)
+    hit = cache.restore("key", restored)
+
+    # assert
+    assert miss is False
+    assert hit is True
+    with open(restored, "rb") as file:
+        assert file.read() == b"binary"
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_artifact_cache__size_exceeded__evict_oldest(tmp_path):
+    # arrange
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_size=10)
+    cache.store("old", _write(str(tmp_path / "a"), b"x" * 6))
+    os.utime(os.path.join(cache.directory, "old"), (0, 0))
+
+    # act
+    cache.store("new", _write(str(tmp_path / "b"), b"y" * 6))
+
+    # assert
+    assert sorted(os.listdir(cache.directory)) == ["new"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_build__cache_hit__skip_compile(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.ARTIFACT_CACHE_ENABLED", True)
+    mocker.patch("app.config.SANDBOX_DIR", str(tmp_path))
+    mocker.patch.object(
+        RustService,
+        "artifact_cache",
+        ArtifactCache(directory=str(tmp_path / "cache"), max_size=1024 ** 3)
+    )
+    code = 'fn main() { println!("cached"); }'
+    first = RustFile(code)
+    second = RustFile(code)
+    compile_spy = mocker.spy(RustService, "_compile")
+
+    # act
+    first_error = RustService._build(first)
+    second_error = RustService._build(second)
+    exec_result = RustService._execute(file=second)
+
+    # assert
+    assert first_error is None
+    assert second_error is None
+    assert compile_spy.call_count == 1
+    assert exec_result.result == "cached"
+    assert RustService.artifact_cache.stats()["hits"] == 1
+    first.remove()
+    second.remove()
+
+
+@pytest.fixture
+def artifact_cache(tmp_path, mocker):
+    mocker.patch("app.config.ARTIFACT_CACHE_ENABLED", True)
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_size=1024 ** 3)
+    mocker.patch.object(RustService, "artifact_cache", cache)
+    return cache
+
+
+def test_artifact_cache__flight_held__waited(tmp_path):
+    # arrange
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_size=1024)
+    os.makedirs(cache.directory)
+    holder = open(os.path.join(cache.directory, "key.lock"), "w")
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    threading.Timer(0.2, holder.close).start()
+
+    # act
+    with cache.flight("key") as waited:
+        pass
+    with cache.flight("key") as waited_again:
+        pass
+
+    # assert
+    assert waited is True
+    assert waited_again is False
+
+
+def test_build__concurrent_identical__compiled_once(artifact_cache, mocker):
+    # arrange
+    code = 'fn main() { println!("once"); }'
+    files = [RustFile(code) for _ in range(4)]
+    compile_spy = mocker.spy(RustService, "_compile")
+    barrier = threading.Barrier(len(files))
+    errors = {}
+
+    def build(index):
+        barrier.wait()
+        errors[index] = RustService._build(files[index])
+
+    threads = [threading.Thread(target=build, args=(i,)) for i in range(len(files))]
+
+    # act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # assert
+    assert compile_spy.call_count == 1
+    assert list(errors.values()) == [None] * len(files)
+    for file in files:
+        assert RustService._execute(file=file).result == "once"
+        file.remove()
+
+
+def test_build__compile_error__shared(artifact_cache, mocker):
+    # arrange
+    code = 'fn main() { let x: i32 = "a"; }'
+    first, second = RustFile(code), RustFile(code)
+    compile_spy = mocker.spy(RustService, "_compile")
+
+    # act
+    first_error = RustService._build(first)
+    second_error = RustService._build(second)
+
+    # assert
+    assert "error[E0308]" in first_error
+    assert second_error == first_error
+    assert compile_spy.call_count == 1
+    first.remove()
+    second.remove()
+
+
+def test_build__compile_timeout__not_cached(artifact_cache, mocker):
+    # arrange
+    file = RustFile("fn main() {}")
+    compile_mock = mocker.patch.object(
+        RustService,
+        "_compile",
+        return_value=messages.MSG_RUST_COMPILE_TIMEOUT
+    )
+
+    # act
+    RustService._build(file)
+    error = RustService._build(file)
+
+    # assert
+    assert error == messages.MSG_RUST_COMPILE_TIMEOUT
+    assert compile_mock.call_count == 2
+    assert os.listdir(artifact_cache.directory) == [RustService._build_key(file) + ".lock"]
+    file.remove()
+
+
+def test_shared_cache__store__fanned_out_no_partial_files(tmp_path):
+    # arrange
+    cache = SharedArtifactCache(directory=str(tmp_path / "shared"), max_size=1024)
+    binary = _write(str(tmp_path / "bin"))
+
+    # act
+    cache.store("abcdef", binary)
+
+    # assert
+    assert sorted(os.listdir(cache.directory)) == [".gc.lock", "ab"]
+    assert os.listdir(os.path.join(cache.directory, "ab")) == ["abcdef"]
+
+
+def test_shared_cache__size_exceeded__evict_oldest(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SHARED_CACHE_GC_INTERVAL", 0)
+    cache = SharedArtifactCache(directory=str(tmp_path / "shared"), max_size=10)
+    cache.store("aa-old", _write(str(tmp_path / "a"), b"x" * 6))
+    os.utime(os.path.join(cache.directory, "aa", "aa-old"), (0, 0))
+
+    # act
+    cache.store("bb-new", _write(str(tmp_path / "b"), b"y" * 6))
+
+    # assert
+    assert os.listdir(os.path.join(cache.directory, "aa")) == []
+    assert os.listdir(os.path.join(cache.directory, "bb")) == ["bb-new"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_cache__gc_lock_held__evict_skipped(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SHARED_CACHE_GC_INTERVAL", 0)
+    cache = SharedArtifactCache(directory=str(tmp_path / "shared"), max_size=10)
+    cache.store("aa-old", _write(str(tmp_path / "a"), b"x" * 6))
+    holder = open(os.path.join(cache.directory, ".gc.lock"), "w")
+    fcntl.flock(holder, fcntl.LOCK_EX)
+
+    # act
+    cache.store("bb-new", _write(str(tmp_path / "b"), b"y" * 6))
+    holder.close()
+
+    # assert
+    assert os.listdir(os.path.join(cache.directory, "aa")) == ["aa-old"]
+    assert cache.stats()["evictions"] == 0
+
+
+def test_build__local_miss_shared_hit__skip_compile(tmp_path, artifact_cache, mocker):
+    # arrange
+    shared = SharedArtifactCache(directory=str(tmp_path / "shared"), max_size=1024 ** 3)
+    mocker.patch.object(RustService, "shared_cache", shared)
+    code = 'fn main() { println!("shared"); }'
+    first, second = RustFile(code), RustFile(code)
+    RustService._build(first)
+    # Another instance: same shared volume, empty local cache
+    other = ArtifactCache(directory=str(tmp_path / "other"), max_size=1024 ** 3)
+    mocker.patch.object(RustService, "artifact_cache", other)
+    compile_spy = mocker.spy(RustService, "_compile")
+
+    # act
+    error = RustService._build(second)
+
+    # assert
+    assert error is None
+    assert compile_spy.call_count == 0
+    assert RustService._execute(file=second).result == "shared"
+    assert shared.stats()["hits"] == 1
+    assert RustService._build_key(second) in os.listdir(other.directory)
+    first.remove()
+    second.remove()
+
+
+def test_lru_cache__maxsize__evict_least_recent():
+    # arrange
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+
+    # act
+    cache.put("c", 3)
+
+    # assert
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_cache__maxbytes__evict_until_fits():
+    # arrange
+    cache = LRUCache(maxbytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+
+    # act
+    cache.put("c", "zzzz")
+    cache.put("huge", "w" * 11)
+
+    # assert
+    assert cache.get("a") is None
+    assert cache.get("b") == "yyyy"
+    assert cache.get("c") == "zzzz"
+    assert cache.get("huge") is None
+    assert cache.size == 8
+
+
+def test_memo__concurrent_same_key__called_once():
+    # arrange
+    memo = Memo()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "value"
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(memo.get("key", fn)))
+    owner.start()
+    started.wait()
+    waiter = threading.Thread(target=lambda: results.append(memo.get("key", fn)))
+    waiter.start()
+
+    # act
+    release.set()
+    owner.join()
+    waiter.join()
+
+    # assert
+    assert calls == [1]
+    assert results == ["value", "value"]
+
+
+def test_memo__exception__raised_for_every_caller():
+    # arrange
+    memo = Memo()
+
+    def fn():
+        raise ValueError("boom")
+
+    # act / assert
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            memo.get("key", fn)
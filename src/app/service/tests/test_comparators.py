@@ -0,0 +1,31 @@
+import pytest
+
+from app import messages
+from app.service.comparators import get_comparator
+from app.service.exceptions import CheckerException
+
+
+@pytest.mark.parametrize("spec, right_value, value, expected", [
+    ("exact", "1 2", "1 2", True),
+    ("exact", "1 2", "1  2", False),
+    ("exact", "", None, True),
+    ("tokens", "1 2\n3", " 1  2 3 ", True),
+    ("tokens", "1 2", "1 2 3", False),
+    ("lines-unordered", "a\nb\nc", "c\na  \nb", True),
+    ("lines-unordered", "a\nb", "a\na", False),
+    ("float", "0.1 x", "0.1000000001 x", True),
+    ("float:1e-2", "3.14", "3.141", True),
+    ("float:1e-6", "3.14", "3.141", False),
+    ("float", "1 2", "1", False),
+    ("float", "1", None, False),
+])
+def test_get_comparator__compare__ok(spec, right_value, value, expected):
+    assert get_comparator(spec)(right_value, value) is expected
+
+
+@pytest.mark.parametrize("spec", ["unknown", "float:abc", "float:-1", "exact:1"])
+def test_get_comparator__invalid_spec__raise_exception(spec):
+    with pytest.raises(CheckerException) as ex_info:
+        get_comparator(spec)
+
+    assert ex_info.value.message == messages.MSG_9
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from app.service import crates
+from app.service.backends import CargoBackend, RustcBackend
+from app.service.entities import RustFile
+from app.service.main import RustService
+
+
+CODE = """
+use tiny::answer;
+fn main() {
+    println!("{}", answer());
+}"""
+
+
+@pytest.fixture(scope="module")
+def crates_dir(tmp_path_factory):
+    root = tmp_path_factory.mktemp("crates")
+    crate = root / "tiny"
+    (crate / "src").mkdir(parents=True)
+    (crate / "Cargo.toml").write_text(
+        '[package]\nname = "tiny"\nversion = "0.1.0"\nedition = "2021"\n'
+    )
+    (crate / "src" / "lib.rs").write_text("pub fn answer() -> u32 { 42 }\n")
+    directory = root / "index"
+    crates.build(str(directory), {"tiny": {"path": str(crate)}})
+    return directory
+
+
+@pytest.fixture
+def prebuilt(mocker, crates_dir):
+    mocker.patch("app.config.CRATES_DIR", str(crates_dir))
+    return crates_dir
+
+
+def test_build__index__rlib_recorded(crates_dir):
+    # act
+    index = json.loads((crates_dir / crates.INDEX).read_text())
+
+    # assert
+    assert list(index["crates"]) == ["tiny"]
+    assert index["crates"]["tiny"].endswith(".rlib")
+
+
+def test_rustc_flags__no_index__empty(mocker, tmp_path):
+    # arrange
+    mocker.patch("app.config.CRATES_DIR", str(tmp_path))
+
+    # act
+    flags = crates.rustc_flags()
+
+    # assert
+    assert flags == []
+
+
+def test_rustc_flags__other_toolchain__empty(mocker, tmp_path, crates_dir):
+    # arrange
+    index = json.loads((crates_dir / crates.INDEX).read_text())
+    index["toolchain"] = "rustc 0.0.0"
+    (tmp_path / crates.INDEX).write_text(json.dumps(index))
+    mocker.patch("app.config.CRATES_DIR", str(tmp_path))
+
+    # act
+    flags = crates.rustc_flags()
+
+    # assert
+    assert flags == []
+
+
+@pytest.mark.parametrize("backend", [CargoBackend.name, RustcBackend.name])
+def test_compile__prebuilt_crate__ok(backend, mocker, prebuilt):
+    # arrange
+    mocker.patch("app.config.COMPILE_BACKEND", backend)
+    file = RustFile(CODE)
+
+    # act
+    check_error = RustService._compile(file, check_only=True)
+    error = RustService._compile(file)
+    exec_result = RustService._execute(file=file)
+
+    # assert
+    assert check_error is None
+    assert error is None
+    assert exec_result.result == "42"
+    file.remove()
+
+
+def test_compile__crate_not_allowed__error(prebuilt):
+    # arrange
+    file = RustFile("use serde::Serialize;\nfn main() {}")
+
+    # act
+    error = RustService._compile(file)
+
+    # assert
+    assert "serde" in error
+    file.remove()
+
+
+def test_build_key__crates_changed__differs(mocker, prebuilt, tmp_path):
+    # arrange
+    file = RustFile("fn main() {}")
+    with_crates = RustService._build_key(file)
+    mocker.patch("app.config.CRATES_DIR", str(tmp_path))
+
+    # act
+    without_crates = RustService._build_key(file)
+
+    # assert
+    assert with_crates != without_crates
+    file.remove()
@@ -0,0 +1,73 @@
+import os
+import time
+
+from app.service.pool import ProjectPool
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_acquire__skeleton_prepared__ok(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SANDBOX_DIR", str(tmp_path))
+    pool = ProjectPool(size=2, manifest="[package]")
+
+    # act
+    project_dir = pool.acquire()
+
+    # assert
+    assert os.path.isdir(os.path.join(project_dir, "src"))
+    assert os.path.isdir(os.path.join(project_dir, "target", "release"))
+    with open(os.path.join(project_dir, "Cargo.toml")) as manifest:
+        assert manifest.read() == "[package]"
+    _wait_for(lambda: pool._ready.qsize() == 2)
+
+
+def test_recycle__used_project__clean(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SANDBOX_DIR", str(tmp_path))
+    pool = ProjectPool(size=1, manifest="[package]")
+    project_dir = pool._create()
+    for path in (("src", "main.rs"), ("target", "release", "bin")):
+        with open(os.path.join(project_dir, *path), "w") as file:
+            file.write("used")
+
+    # act
+    pool._recycle(project_dir)
+
+    # assert
+    assert os.listdir(os.path.join(project_dir, "src")) == []
+    assert os.listdir(os.path.join(project_dir, "target", "release")) == []
+    assert os.path.isfile(os.path.join(project_dir, "Cargo.toml"))
+
+
+def test_release__pool_full__removed(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SANDBOX_DIR", str(tmp_path))
+    pool = ProjectPool(size=1, manifest="[package]")
+    project_dir = pool.acquire()
+    _wait_for(lambda: pool._ready.qsize() == 1)
+
+    # act
+    pool.release(project_dir)
+
+    # assert
+    _wait_for(lambda: not os.path.exists(project_dir))
+    assert pool._ready.qsize() == 1
+
+
+def test_release__pool_disabled__removed(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SANDBOX_DIR", str(tmp_path))
+    pool = ProjectPool(size=0, manifest="[package]")
+    project_dir = pool.acquire()
+
+    # act
+    pool.release(project_dir)
+
+    # assert
+    assert not os.path.exists(project_dir)
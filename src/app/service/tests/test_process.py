@@ -0,0 +1,76 @@
+import sys
+import subprocess
+
+import pytest
+
+from app.service.process import communicate, wait
+
+
+def _popen(code):
+    return subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def test_communicate__echo_input__ok():
+    # arrange
+    proc = _popen("import sys; data = sys.stdin.read(); print(data[::-1]); print('e', file=sys.stderr)")
+
+    # act
+    out, err, truncated = communicate(proc, input="x" * 100000 + "мир", timeout=5)
+
+    # assert
+    assert out == "рим" + "x" * 100000 + "\n"
+    assert err == "e\n"
+    assert truncated is False
+
+
+def test_communicate__output_limit__killed_and_truncated():
+    # arrange
+    proc = _popen("import sys\nwhile True: sys.stdout.write('x' * 1000)")
+
+    # act
+    out, err, truncated = communicate(proc, timeout=5, limit=10000)
+
+    # assert
+    assert out == "x" * 10000
+    assert truncated is True
+    assert proc.returncode is not None
+
+
+def test_communicate__multibyte_split__decoded():
+    # arrange
+    proc = _popen("import sys, time\nsys.stdout.buffer.write(b'\\xd0'); sys.stdout.flush(); time.sleep(0.1); sys.stdout.buffer.write(b'\\xbc')")
+
+    # act
+    out, _, _ = communicate(proc, timeout=5)
+
+    # assert
+    assert out == "м"
+
+
+def test_communicate__timeout__raise_exception():
+    # arrange
+    proc = _popen("import time; time.sleep(10)")
+
+    # act / assert
+    with pytest.raises(subprocess.TimeoutExpired):
+        communicate(proc, timeout=0.2)
+    proc.kill()
+    proc.wait()
+
+
+def test_wait__exited__rusage_kept():
+    # arrange
+    proc = subprocess.Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+
+    # act
+    returncode = wait(proc, timeout=5)
+
+    # assert
+    assert returncode == 3
+    assert proc.returncode == 3
+    assert proc.rusage.ru_maxrss > 0
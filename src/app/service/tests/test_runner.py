@@ -0,0 +1,106 @@
+import sys
+import socket
+import subprocess
+
+import pytest
+
+from app import messages
+from app.entities import Limits
+from app.service.entities import RustFile
+from app.service.main import RustService
+from app.service.process import communicate
+from app.service.runner import RemoteProcess
+
+
+@pytest.fixture(autouse=True)
+def runner(mocker, tmp_path):
+    mocker.patch("app.config.RUNNER_ENABLED", True)
+    mocker.patch("app.config.RUNNER_SOCKET", str(tmp_path / "runner.sock"))
+    mocker.patch("app.config.RUNNER_IDLE_TIMEOUT", 1)
+
+
+def test_remote_process__communicate__ok():
+    # arrange
+    code = "import sys; print(sys.stdin.read()[::-1]); print('e', file=sys.stderr)"
+    proc = RemoteProcess([sys.executable, "-c", code])
+
+    # act
+    out, err, truncated = communicate(proc, input="abc", timeout=5)
+
+    # assert
+    assert (out, err, truncated) == ("cba\n", "e\n", False)
+    assert proc.returncode == 0
+    assert proc.rusage.ru_maxrss > 0
+
+
+def test_remote_process__timeout__killed():
+    # arrange
+    proc = RemoteProcess([sys.executable, "-c", "import time; time.sleep(30)"])
+
+    # act
+    with pytest.raises(subprocess.TimeoutExpired):
+        communicate(proc, timeout=0.2)
+    proc.kill()
+
+    # assert
+    assert proc.returncode == -9
+
+
+def test_remote_process__stale_socket__runner_restarted(tmp_path):
+    # arrange
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(tmp_path / "runner.sock"))
+    stale.close()
+
+    # act
+    proc = RemoteProcess(["true"])
+
+    # assert
+    assert proc.wait(timeout=5) == 0
+
+
+def test_remote_process__bad_binary__error(tmp_path):
+    # act
+    with pytest.raises(OSError):
+        RemoteProcess([str(tmp_path / "missing")])
+
+
+def test_execute__runner__ok():
+    # arrange
+    code = """
+    fn main() {
+        let mut s = String::new();
+        std::io::stdin().read_line(&mut s).unwrap();
+        println!("{}", s.trim().len());
+    }"""
+    file = RustFile(code)
+    RustService._compile(file)
+
+    # act
+    exec_result = RustService._execute(file=file, data_in="hello")
+
+    # assert
+    assert exec_result.result == "5"
+    assert exec_result.error is None
+    assert exec_result.usage.cpu_time is not None
+    file.remove()
+
+
+def test_execute__runner_cpu_limit__error():
+    # arrange
+    code = """
+    fn main() {
+        let mut x: u64 = 0;
+        loop {
+            x = std::hint::black_box(x.wrapping_add(1));
+        }
+    }"""
+    file = RustFile(code)
+    RustService._compile(file)
+
+    # act
+    exec_result = RustService._execute(file=file, limits=Limits(timeout=5, cpu_timeout=1))
+
+    # assert
+    assert exec_result.error == messages.MSG_13
+    file.remove()
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from app.service import exceptions
+from app.service.scheduler import SlotPool
+
+
+def test_slot__free__acquired(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SCHEDULER_DIR", str(tmp_path))
+    pool = SlotPool("compile", 2)
+
+    # act / assert
+    with pool.slot():
+        with pool.slot():
+            pass
+
+
+def test_slot__busy_no_wait__raise_exception(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SCHEDULER_DIR", str(tmp_path))
+    pool = SlotPool("compile", 1)
+
+    # act / assert
+    with pool.slot():
+        with pytest.raises(exceptions.OverloadedException):
+            with pool.slot():
+                pass
+
+
+def test_slot__released__waiter_acquired(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SCHEDULER_DIR", str(tmp_path))
+    pool = SlotPool("execute", 1)
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.slot():
+            acquired.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait(5)
+
+    # act
+    threading.Timer(0.1, release.set).start()
+    with pool.slot(timeout=5):
+        pass
+
+    # assert
+    holder.join(5)
+    assert not holder.is_alive()
+
+
+def test_slot__disabled__not_limited(tmp_path, mocker):
+    # arrange
+    mocker.patch("app.config.SCHEDULER_DIR", str(tmp_path))
+    pool = SlotPool("compile", 0)
+
+    # act / assert
+    with pool.slot():
+        with pool.slot():
+            pass
+    assert list(tmp_path.iterdir()) == []
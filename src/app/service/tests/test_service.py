@@ -1,16 +1,26 @@
 # Тесты запускать только в контейнере!
+import time
 import pytest
+import threading
 import subprocess
-from unittest.mock import call
+from unittest.mock import ANY, call
 
 from app.service.main import RustService
 from app import config, messages
-from app.entities import DebugData, TestsData, TestData
+from app.entities import CheckData, DebugData, Limits, TestsData, TestData
+from app.service.cache import LRUCache
 from app.service.entities import ExecuteResult, RustFile
 from app.service.exceptions import CheckerException
 from app.service import exceptions
 
 
+DEFAULT_LIMITS = Limits(
+    timeout=config.TIMEOUT,
+    cpu_timeout=config.CPU_TIMEOUT,
+    request_timeout=config.REQUEST_TIMEOUT,
+)
+
+
 def test_execute__float_result__ok():
     """Тест для Rust: Дробная часть"""
     # arrange
@@ -150,6 +160,97 @@ def test_execute__deep_recursive__error(mocker):
     file.remove()
 
 
+def test_execute__runaway_output__truncated(mocker):
+    # arrange
+    code = """
+    fn main() {
+        loop { println!("x"); }
+    }"""
+    file = RustFile(code)
+    RustService._compile(file)
+    mocker.patch("app.config.OUTPUT_LIMIT", 1000)
+
+    # act
+    exec_result = RustService._execute(file=file)
+
+    # assert
+    assert exec_result.error == messages.MSG_12
+    assert exec_result.result == "\n".join(["x"] * 500)
+    file.remove()
+
+
+def test_execute__usage__collected():
+    # arrange
+    code = """
+    fn main() {
+        let v: Vec<u64> = (0..2_000_000).collect();
+        println!("{}", v.iter().sum::<u64>());
+    }"""
+    file = RustFile(code)
+    RustService._compile(file)
+
+    # act
+    exec_result = RustService._execute(file=file)
+
+    # assert
+    assert exec_result.result == "1999999000000"
+    assert exec_result.usage.wall_time > 0
+    assert exec_result.usage.cpu_time >= 0
+    assert exec_result.usage.max_rss > 16 * 1024  # KiB, the vector alone is 16 MB
+    file.remove()
+
+
+def test_execute__cpu_limit__error():
+    # arrange
+    code = """
+    fn main() {
+        let mut x: u64 = 0;
+        loop {
+            x = std::hint::black_box(x.wrapping_add(1));
+        }
+    }"""
+    file = RustFile(code)
+    RustService._compile(file)
+    limits = Limits(timeout=5, cpu_timeout=1)
+
+    # act
+    exec_result = RustService._execute(file=file, limits=limits)
+
+    # assert
+    assert exec_result.error == messages.MSG_13
+    assert exec_result.usage.cpu_time > 0.5
+    assert exec_result.usage.wall_time < 5
+    file.remove()
+
+
+def test_check__compile_error__details_normalized():
+    # arrange
+    data = CheckData(code='fn main() { let x: i32 = "a"; }')
+
+    # act
+    check_result = RustService.check(data)
+
+    # assert
+    assert check_result.ok is False
+    assert check_result.error == messages.MSG_RUST_COMPILE_ERROR
+    assert "error[E0308]: mismatched types" in check_result.details
+    assert " --> src/main.rs:1:26" in check_result.details
+    assert config.SANDBOX_DIR not in check_result.details
+
+
+def test_check__wrapped_code__ok():
+    # arrange
+    data = CheckData(code='let x = 2;\nprintln!("{}", x);')
+
+    # act
+    check_result = RustService.check(data)
+
+    # assert
+    assert check_result.ok is True
+    assert check_result.error is None
+    assert check_result.details is None
+
+
 def test_execute__write_access__error():
     # arrange
     code = """
@@ -202,8 +303,8 @@ def test_execute__clear_error_message__ok(mocker):
     file = RustFile(code)
     mocker.patch.object(subprocess.Popen, "__init__", return_value=None)
     communicate_mock = mocker.patch(
-        "subprocess.Popen.communicate",
-        return_value=(None, raw_error_message)
+        "app.service.main.communicate",
+        return_value=(None, raw_error_message, False)
     )
     kill_mock = mocker.patch("subprocess.Popen.kill")
 
@@ -211,7 +312,12 @@ def test_execute__clear_error_message__ok(mocker):
     exec_result = RustService._execute(file=file)
 
     # assert
-    communicate_mock.assert_called_once_with(input=None, timeout=config.TIMEOUT)
+    communicate_mock.assert_called_once_with(
+        ANY,
+        input=None,
+        timeout=config.TIMEOUT,
+        limit=config.OUTPUT_LIMIT
+    )
     kill_mock.assert_called_once()
     assert exec_result.result is None
     assert exec_result.error == clear_error_message
@@ -225,7 +331,7 @@ def test_execute__proc_exception__raise_exception(mocker):
     file = RustFile(code)
     mocker.patch.object(subprocess.Popen, "__init__", return_value=None)
     communicate_mock = mocker.patch(
-        "subprocess.Popen.communicate",
+        "app.service.main.communicate",
         side_effect=Exception()
     )
     kill_mock = mocker.patch("subprocess.Popen.kill")
@@ -236,7 +342,12 @@ def test_execute__proc_exception__raise_exception(mocker):
 
     # assert
     assert ex_info.value.message == messages.MSG_6
-    communicate_mock.assert_called_once_with(input=data_in, timeout=config.TIMEOUT)
+    communicate_mock.assert_called_once_with(
+        ANY,
+        input=data_in,
+        timeout=config.TIMEOUT,
+        limit=config.OUTPUT_LIMIT
+    )
     kill_mock.assert_called_once()
     file.remove()
 
@@ -245,7 +356,7 @@ def test_compile__timeout__error(mocker):
     # arrange
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     mocker.patch.object(subprocess.Popen, "__init__", return_value=None)
     communicate_mock = mocker.patch(
         "subprocess.Popen.communicate",
@@ -258,7 +369,7 @@ def test_compile__timeout__error(mocker):
 
     # assert
     assert error == messages.MSG_1
-    communicate_mock.assert_called_once_with(timeout=config.TIMEOUT)
+    communicate_mock.assert_called_once_with(timeout=config.COMPILE_TIMEOUT)
     kill_mock.assert_called_once()
 
 
@@ -266,7 +377,7 @@ def test_compile__exception__raise_exception(mocker):
     # arrange
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     mocker.patch.object(subprocess.Popen, "__init__", return_value=None)
     communicate_mock = mocker.patch(
         "subprocess.Popen.communicate",
@@ -280,7 +391,7 @@ def test_compile__exception__raise_exception(mocker):
 
     # assert
     assert ex_info.value.message == messages.MSG_7
-    communicate_mock.assert_called_once_with(timeout=config.TIMEOUT)
+    communicate_mock.assert_called_once_with(timeout=config.COMPILE_TIMEOUT)
     kill_mock.assert_called_once()
 
 
@@ -288,7 +399,7 @@ def test_compile__error__error(mocker):
     # arrange
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     compile_error = "some error"
     mocker.patch.object(subprocess.Popen, "__init__", return_value=None)
     communicate_mock = mocker.patch(
@@ -302,7 +413,7 @@ def test_compile__error__error(mocker):
 
     # assert
     assert error == compile_error
-    communicate_mock.assert_called_once_with(timeout=config.TIMEOUT)
+    communicate_mock.assert_called_once_with(timeout=config.COMPILE_TIMEOUT)
     kill_mock.assert_called_once()
 
 
@@ -310,7 +421,7 @@ def test_compile__ok(mocker):
     # arrange
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     mocker.patch.object(subprocess.Popen, "__init__", return_value=None)
     communicate_mock = mocker.patch(
         "subprocess.Popen.communicate",
@@ -322,7 +433,7 @@ def test_compile__ok(mocker):
     RustService._compile(file_mock)
 
     # assert
-    communicate_mock.assert_called_once_with(timeout=config.TIMEOUT)
+    communicate_mock.assert_called_once_with(timeout=config.COMPILE_TIMEOUT)
     kill_mock.assert_called_once()
 
 
@@ -444,7 +555,7 @@ def test_debug__compile_is_success__ok(mocker):
     # arrange
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     compile_mock = mocker.patch(
         "app.service.main.RustService._compile",
         return_value=None
@@ -465,7 +576,11 @@ def test_debug__compile_is_success__ok(mocker):
     # assert
     file_mock.remove.assert_called_once()
     compile_mock.assert_called_once_with(file_mock)
-    execute_mock.assert_called_once_with(file=file_mock, data_in=data.data_in)
+    execute_mock.assert_called_once_with(
+        file=file_mock,
+        data_in=data.data_in,
+        limits=DEFAULT_LIMITS
+    )
     assert debug_result.result == execute_result.result
     assert debug_result.error == execute_result.error
 
@@ -475,7 +590,7 @@ def test_debug__compile_return_error__ok(mocker):
     compile_error = "some error"
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     compile_mock = mocker.patch(
         "app.service.main.RustService._compile",
         return_value=compile_error
@@ -496,9 +611,10 @@ def test_debug__compile_return_error__ok(mocker):
 
 def test_testing__compile_is_success__ok(mocker):
     # arrange
+    mocker.patch("app.config.TEST_WORKERS", 1)
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     compile_mock = mocker.patch(
         "app.service.main.RustService._compile",
         return_value=None
@@ -527,8 +643,8 @@ def test_testing__compile_is_success__ok(mocker):
     # assert
     compile_mock.assert_called_once_with(file_mock)
     assert execute_mock.call_args_list == [
-        call(file=file_mock, data_in=test_1.data_in),
-        call(file=file_mock, data_in=test_2.data_in),
+        call(file=file_mock, data_in=test_1.data_in, limits=DEFAULT_LIMITS),
+        call(file=file_mock, data_in=test_2.data_in, limits=DEFAULT_LIMITS),
     ]
     assert check_mock.call_args_list == [
         call(
@@ -557,7 +673,7 @@ def test_testing__compile_return_error__ok(mocker):
     # arrange
     file_mock = mocker.Mock()
     file_mock.remove = mocker.Mock()
-    mocker.patch.object(RustFile, "__new__", return_value=file_mock)
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
     compile_error = "some error"
     compile_mock = mocker.patch(
         "app.service.main.RustService._compile",
@@ -586,3 +702,276 @@ def test_testing__compile_return_error__ok(mocker):
     assert tests_result[1].result is None
     assert tests_result[1].error == compile_error
     assert tests_result[1].ok is False
+
+
+def test_testing__parallel__keep_order(mocker):
+    # arrange
+    mocker.patch("app.config.TEST_WORKERS", 4)
+    mocker.patch.object(RustService.scheduler.execute, "size", 4)
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value=None)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def execute(file, data_in, limits):
+        barrier.wait()
+        return ExecuteResult(result=data_in, error=None)
+
+    mocker.patch("app.service.main.RustService._execute", side_effect=execute)
+    checker = (
+        "def checker(right_value: str, value: str) -> bool:"
+        "  return right_value == value"
+    )
+    tests = [TestData(data_in=str(i), data_out="1") for i in range(3)]
+    data = TestsData(code="some code", checker=checker, tests=tests)
+
+    # act
+    testing_result = RustService.testing(data)
+
+    # assert
+    assert [test.result for test in testing_result.tests] == ["0", "1", "2"]
+    assert [test.ok for test in testing_result.tests] == [False, True, False]
+    file_mock.remove.assert_called_once()
+
+
+def test_check__same_checker__validated_once(mocker):
+    # arrange
+    mocker.patch.object(RustService, "checker_cache", LRUCache(maxsize=2))
+    validate_spy = mocker.spy(RustService, "_validate_checker_func")
+    checker_func = (
+        "def checker(right_value: str, value: str) -> bool:"
+        "  return right_value == value"
+    )
+
+    # act
+    results = [
+        RustService._check(checker_func=checker_func, right_value="1", value=value)
+        for value in ("1", "2", "1")
+    ]
+
+    # assert
+    assert results == [True, False, True]
+    assert validate_spy.call_count == 1
+
+
+
+def test_testing__comparator__checker_not_called(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value=None)
+    mocker.patch(
+        "app.service.main.RustService._execute",
+        return_value=ExecuteResult(result="1 2", error=None)
+    )
+    check_mock = mocker.patch("app.service.main.RustService._check")
+    tests = [TestData(data_in="", data_out="1  2"), TestData(data_in="", data_out="2 1")]
+    data = TestsData(code="some code", comparator="tokens", tests=tests)
+
+    # act
+    testing_result = RustService.testing(data)
+
+    # assert
+    check_mock.assert_not_called()
+    assert [test.ok for test in testing_result.tests] == [True, False]
+
+
+def test_testing__callbacks__called_per_test(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value="some error")
+    on_compile, on_test = mocker.Mock(), mocker.Mock()
+    tests = [TestData(data_in="1", data_out="1"), TestData(data_in="2", data_out="2")]
+    data = TestsData(code="some code", checker="some checker", tests=tests)
+
+    # act
+    RustService.testing(data, on_compile=on_compile, on_test=on_test)
+
+    # assert
+    on_compile.assert_called_once_with("some error")
+    assert on_test.call_args_list == [call(0, tests[0]), call(1, tests[1])]
+
+
+def test_run__budget_shorter_than_timeout__request_timeout_error(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    execute_mock = mocker.patch(
+        "app.service.main.RustService._execute",
+        return_value=ExecuteResult(result=None, error=messages.MSG_1)
+    )
+
+    # act
+    exec_result = RustService._run(
+        file=file_mock,
+        limits=DEFAULT_LIMITS,
+        deadline=time.monotonic() + 1,
+    )
+
+    # assert
+    assert exec_result.error == messages.MSG_14
+    assert execute_mock.call_args.kwargs["limits"].timeout <= 1
+
+
+def test_testing__request_budget_exhausted__skip_tests(mocker):
+    # arrange
+    mocker.patch("app.config.TEST_WORKERS", 1)
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value=None)
+
+    def execute(**kwargs):
+        time.sleep(0.3)
+        return ExecuteResult(result="1", error=None)
+
+    execute_mock = mocker.patch(
+        "app.service.main.RustService._execute",
+        side_effect=execute
+    )
+    tests = [TestData(data_in=str(i), data_out="1") for i in range(3)]
+    data = TestsData(
+        code="some code",
+        comparator="exact",
+        tests=tests,
+        limits=Limits(request_timeout=0.5),
+    )
+
+    # act
+    RustService.testing(data)
+
+    # assert
+    assert execute_mock.call_count == 2
+    assert [test.ok for test in tests] == [True, True, False]
+    assert tests[2].error == messages.MSG_14
+
+
+def test_debug__check_only__not_executed(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    compile_mock = mocker.patch(
+        "app.service.main.RustService._compile",
+        return_value=None
+    )
+    execute_mock = mocker.patch("app.service.main.RustService._execute")
+    data = DebugData(code="some code", check_only=True)
+
+    # act
+    debug_result = RustService.debug(data)
+
+    # assert
+    compile_mock.assert_called_once_with(file_mock, check_only=True)
+    execute_mock.assert_not_called()
+    file_mock.remove.assert_called_once()
+    assert debug_result.result is None
+    assert debug_result.error is None
+
+
+def test_testing__check_only_compile_error__tests_failed(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    compile_mock = mocker.patch(
+        "app.service.main.RustService._compile",
+        return_value="some error"
+    )
+    execute_mock = mocker.patch("app.service.main.RustService._execute")
+    tests = [TestData(data_in="1", data_out="1"), TestData(data_in="2", data_out="2")]
+    data = TestsData(code="some code", comparator="exact", tests=tests, check_only=True)
+
+    # act
+    RustService.testing(data)
+
+    # assert
+    compile_mock.assert_called_once_with(file_mock, check_only=True)
+    execute_mock.assert_not_called()
+    assert [(test.ok, test.error) for test in tests] == [(False, "some error")] * 2
+
+
+def test_debug__profile_default__from_config(mocker):
+    # arrange
+    mocker.patch("app.config.DEBUG_PROFILE", "fast-compile")
+    file_mock = mocker.Mock()
+    new_mock = mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value="some error")
+
+    # act
+    RustService.debug(DebugData(code="some code"))
+    RustService.debug(DebugData(code="some code", profile="fast-run"))
+
+    # assert
+    assert new_mock.call_args_list == [
+        call("some code", profile="fast-compile"),
+        call("some code", profile="fast-run"),
+    ]
+
+
+def test_testing__duplicate_inputs__run_once(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value=None)
+    execute_mock = mocker.patch(
+        "app.service.main.RustService._execute",
+        side_effect=lambda file, data_in, limits: ExecuteResult(result=data_in, error=None)
+    )
+    tests = [TestData(data_in=value, data_out=value) for value in ("1", "2", "1", "1")]
+    data = TestsData(code="some code", comparator="exact", tests=tests)
+
+    # act
+    RustService.testing(data)
+
+    # assert
+    assert sorted(c.kwargs["data_in"] for c in execute_mock.call_args_list) == ["1", "2"]
+    assert [test.result for test in tests] == ["1", "2", "1", "1"]
+    assert all(test.ok for test in tests)
+
+
+def test_testing__no_cache__run_every_test(mocker):
+    # arrange
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value=None)
+    execute_mock = mocker.patch(
+        "app.service.main.RustService._execute",
+        return_value=ExecuteResult(result="1", error=None)
+    )
+    tests = [TestData(data_in="1", data_out="1") for _ in range(3)]
+    data = TestsData(code="some code", comparator="exact", tests=tests, no_cache=True)
+
+    # act
+    RustService.testing(data)
+
+    # assert
+    assert execute_mock.call_count == 3
+
+
+def test_debug__result_cache__reused_across_requests(mocker):
+    # arrange
+    mocker.patch("app.config.RESULT_CACHE_ENABLED", True)
+    mocker.patch.object(RustService, "result_cache", LRUCache(maxbytes=1024 * 1024))
+    file_mock = mocker.Mock()
+    mocker.patch("app.service.main.RustFile", return_value=file_mock)
+    mocker.patch("app.service.main.RustService._compile", return_value=None)
+    mocker.patch("app.service.main.RustService._build_key", return_value="build key")
+    execute_mock = mocker.patch(
+        "app.service.main.RustService._execute",
+        side_effect=[
+            ExecuteResult(result="1", error=None),
+            ExecuteResult(result=None, error=messages.MSG_1),
+            ExecuteResult(result=None, error=messages.MSG_1),
+            ExecuteResult(result="3", error=None),
+        ]
+    )
+
+    # act
+    first = RustService.debug(DebugData(code="some code", data_in="1"))
+    second = RustService.debug(DebugData(code="some code", data_in="1"))
+    timeouts = [RustService.debug(DebugData(code="some code", data_in="2")) for _ in range(2)]
+    bypass = RustService.debug(DebugData(code="some code", data_in="1", no_cache=True))
+
+    # assert
+    assert first.result == second.result == "1"
+    assert [res.error for res in timeouts] == [messages.MSG_1] * 2
+    assert bypass.result == "3"
+    assert execute_mock.call_count == 4
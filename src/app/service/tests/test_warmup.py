@@ -0,0 +1,57 @@
+import time
+
+from app.service import warmup
+from app.service.warmup import WarmUp
+
+
+def test_canary__ok():
+    # act
+    error = warmup.canary()
+
+    # assert
+    assert error is None
+
+
+def test_start__disabled__ready_at_once(mocker):
+    # arrange
+    mocker.patch("app.config.WARMUP_ENABLED", False)
+    warm_up = WarmUp()
+
+    # act
+    warm_up.start()
+
+    # assert
+    assert warm_up.status() == {'status': 'ready', 'error': None}
+
+
+def test_start__canary_failed__retried_until_ready(mocker):
+    # arrange
+    mocker.patch("app.config.WARMUP_ENABLED", True)
+    mocker.patch("app.config.WARMUP_RETRY_INTERVAL", 0)
+    canary = mocker.patch(
+        "app.service.warmup.canary",
+        side_effect=["Compilation error", RuntimeError("boom"), None]
+    )
+    warm_up = WarmUp()
+
+    # act
+    warm_up.start()
+    deadline = time.monotonic() + 5
+    while not warm_up.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # assert
+    assert warm_up.ready is True
+    assert canary.call_count == 3
+
+
+def test_status__failed__error_reported():
+    # arrange
+    warm_up = WarmUp()
+    warm_up.error = "Compilation error"
+
+    # act
+    status = warm_up.status()
+
+    # assert
+    assert status == {'status': 'failed', 'error': "Compilation error"}
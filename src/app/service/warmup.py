@@ -0,0 +1,96 @@
+"""Startup warm-up: build and run a canary program before taking traffic.
+
+The first builds after a container start read rustc, cargo and the std
+rlibs from a cold page cache and fill an empty project pool and
+artifact cache. The canary pays for that, and /health/ready keeps the
+load balancer away until it has.
+"""
+import os
+import time
+import threading
+from typing import Optional
+
+from app import config
+from app.entities import DebugData
+from app.service.main import RustService
+
+
+CANARY = """
+use std::collections::BTreeMap;
+use std::io::Read;
+
+fn main() {
+    let mut input = String::new();
+    std::io::stdin().read_to_string(&mut input).unwrap();
+    let mut counts = BTreeMap::new();
+    for word in input.split_whitespace() {
+        *counts.entry(word).or_insert(0) += 1;
+    }
+    let pairs: Vec<String> = counts.iter().map(|(w, n)| format!("{}={}", w, n)).collect();
+    println!("{}", pairs.join(" "));
+}
+"""
+CANARY_INPUT = 'b a b'
+CANARY_OUTPUT = 'a=1 b=2'
+
+
+def canary() -> Optional[str]:
+    """None if the canary builds and prints the expected output with
+    every profile requests are built with by default, else the error."""
+    for profile in dict.fromkeys((config.DEBUG_PROFILE, config.TESTING_PROFILE)):
+        data = RustService.debug(DebugData(
+            code=CANARY,
+            data_in=CANARY_INPUT,
+            profile=profile,
+            no_cache=True,
+        ))
+        if data.error or data.result != CANARY_OUTPUT:
+            return data.error or f'Unexpected canary output: {data.result!r}'
+    return None
+
+
+class WarmUp:
+
+    """Readiness of this process.
+
+    start() runs the canary on a background thread, once per process
+    like the project pool and job threads, and retries a failed one
+    every WARMUP_RETRY_INTERVAL seconds. Builds after the first hit the
+    artifact cache, so every worker checks itself at little cost.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.ready, self.error = not config.WARMUP_ENABLED, None
+            if not self.ready:
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.error = canary()
+            except Exception as ex:
+                self.error = str(ex)
+            if self.error is None:
+                self.ready = True
+                return
+            time.sleep(config.WARMUP_RETRY_INTERVAL)
+
+    def status(self) -> dict:
+        if self.ready:
+            return {'status': 'ready', 'error': None}
+        return {'status': 'failed' if self.error else 'warming', 'error': self.error}
+
+
+warm_up = WarmUp()
@@ -2,6 +2,12 @@ from app.main import create_app
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def warm_up(mocker):
+    # Requests start the warm-up, tests must not build the canary
+    mocker.patch("app.config.WARMUP_ENABLED", False)
+
+
 @pytest.fixture()
 def app():
     app = create_app()
@@ -1,9 +1,15 @@
+import json
+import time
+
 from app.entities import (
+    CheckData,
     DebugData,
+    Limits,
     TestsData,
     TestData
 )
-from app.service.exceptions import ServiceException
+from app import config, messages
+from app.service.exceptions import ServiceException, OverloadedException
 
 
 def test_debug__ok(client, mocker):
@@ -360,3 +366,463 @@ def test_testing__validation_error__bad_request(client, mocker):
     }
     service_mock.assert_not_called()
 
+
+
+def test_testing__comparator__ok(client, mocker):
+
+    request_data = {
+        'code': 'some code',
+        'comparator': 'float:1e-3',
+        'tests': [
+            {
+                'data_in': 'some test input',
+                'data_out': 'some test out'
+            }
+        ]
+    }
+
+    serialized_data = TestsData(
+        code='some code',
+        comparator='float:1e-3',
+        tests=[
+            TestData(
+                data_in='some test input',
+                data_out='some test out'
+            )
+        ]
+    )
+    testing_mock = mocker.patch(
+        'app.service.main.RustService.testing',
+        return_value=TestsData(tests=[TestData(result='1', ok=True)])
+    )
+
+    response = client.post('/testing/', json=request_data)
+
+    assert response.status_code == 200
+    assert response.json['ok'] is True
+    testing_mock.assert_called_once_with(serialized_data)
+
+
+def test_testing__invalid_comparator__bad_request(client, mocker):
+
+    request_data = {
+        'code': 'some code',
+        'comparator': 'unknown',
+        'tests': [
+            {
+                'data_in': 'some test input',
+                'data_out': 'some test out'
+            }
+        ]
+    }
+
+    service_mock = mocker.patch('app.service.main.RustService.testing')
+
+    response = client.post('/testing/', json=request_data)
+
+    assert response.status_code == 400
+    assert response.json['error'] == 'Validation error'
+    assert response.json['details'] == {'comparator': [messages.MSG_9]}
+    service_mock.assert_not_called()
+
+
+def _wait_job(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f'/jobs/{job_id}')
+        if response.json['status'] in ('done', 'failed'):
+            return response
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_jobs__testing__done(client, mocker, tmp_path):
+
+    mocker.patch('app.config.JOB_DIR', str(tmp_path))
+    request_data = {
+        'type': 'testing',
+        'data': {
+            'code': 'some code',
+            'checker': 'some func',
+            'tests': [
+                {
+                    'data_in': 'some test 1 input',
+                    'data_out': 'some test 1 out'
+                }
+            ]
+        }
+    }
+
+    def testing(data):
+        data.tests[0].result, data.tests[0].ok = 'some result', True
+        return data
+
+    testing_mock = mocker.patch(
+        'app.service.main.RustService.testing',
+        side_effect=testing
+    )
+
+    response = client.post('/jobs/', json=request_data)
+
+    assert response.status_code == 202
+    assert response.json['type'] == 'testing'
+    assert response.json['status'] in ('queued', 'running', 'done')
+    response = _wait_job(client, response.json['id'])
+    assert response.status_code == 200
+    assert response.json['status'] == 'done'
+    assert response.json['error'] is None
+    assert response.json['result']['ok'] is True
+    assert response.json['result']['tests'][0]['result'] == 'some result'
+    testing_mock.assert_called_once()
+
+
+def test_jobs__service_exception__failed(client, mocker, tmp_path):
+
+    mocker.patch('app.config.JOB_DIR', str(tmp_path))
+    request_data = {
+        'type': 'debug',
+        'data': {'code': 'some code'}
+    }
+    service_ex = ServiceException(
+        message='some message',
+        details='some details'
+    )
+    mocker.patch(
+        'app.service.main.RustService.debug',
+        side_effect=service_ex
+    )
+
+    response = client.post('/jobs/', json=request_data)
+    response = _wait_job(client, response.json['id'])
+
+    assert response.json['status'] == 'failed'
+    assert response.json['error'] == service_ex.message
+    assert response.json['details'] == service_ex.details
+    assert response.json['result'] is None
+
+
+def test_jobs__other_process_snapshot__ok(client, mocker, tmp_path):
+
+    mocker.patch('app.config.JOB_DIR', str(tmp_path))
+    job_id = 'a' * 32
+    with open(tmp_path / f'{job_id}.json', 'w') as file:
+        json.dump({'id': job_id, 'status': 'running'}, file)
+
+    response = client.get(f'/jobs/{job_id}/')
+
+    assert response.status_code == 200
+    assert response.json == {'id': job_id, 'status': 'running'}
+
+
+def test_jobs__unknown_id__not_found(client, mocker, tmp_path):
+
+    mocker.patch('app.config.JOB_DIR', str(tmp_path))
+
+    response = client.get('/jobs/unknown')
+
+    assert response.status_code == 404
+    assert response.json['error'] == messages.MSG_10
+
+
+def test_jobs__validation_error__bad_request(client, mocker):
+
+    service_mock = mocker.patch('app.service.main.RustService.testing')
+
+    response = client.post('/jobs/', json={'type': 'testing', 'data': {}})
+
+    assert response.status_code == 400
+    assert response.json['details'] == {
+        'data': {
+            'code': ['Missing data for required field.'],
+            'tests': ['Missing data for required field.']
+        }
+    }
+    service_mock.assert_not_called()
+
+
+def _fake_testing(data, on_compile=None, on_test=None):
+    on_compile(None)
+    for index, test in enumerate(data.tests):
+        test.result, test.ok = f'result {index}', index == 0
+        on_test(index, test)
+    return data
+
+
+def test_testing__ndjson__stream(client, mocker):
+
+    request_data = {
+        'code': 'some code',
+        'checker': 'some func',
+        'tests': [
+            {'data_in': 'in 1', 'data_out': 'out 1'},
+            {'data_in': 'in 2', 'data_out': 'out 2'}
+        ]
+    }
+    mocker.patch(
+        'app.service.main.RustService.testing',
+        side_effect=_fake_testing
+    )
+
+    response = client.post(
+        '/testing/',
+        json=request_data,
+        headers={'Accept': 'application/x-ndjson'}
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert events == [
+        {'event': 'compile', 'error': None},
+        {'event': 'test', 'index': 0, 'result': 'result 0', 'error': None, 'ok': True},
+        {'event': 'test', 'index': 1, 'result': 'result 1', 'error': None, 'ok': False},
+        {'event': 'summary', 'num': 2, 'num_ok': 1, 'ok': False},
+    ]
+
+
+def test_testing__sse_service_exception__error_event(client, mocker):
+
+    request_data = {
+        'code': 'some code',
+        'checker': 'some func',
+        'tests': [{'data_in': 'in 1', 'data_out': 'out 1'}]
+    }
+    mocker.patch(
+        'app.service.main.RustService.testing',
+        side_effect=ServiceException(message='some message', details='some details')
+    )
+
+    response = client.post(
+        '/testing/',
+        json=request_data,
+        headers={'Accept': 'text/event-stream'}
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.data.decode() == (
+        'event: error\n'
+        'data: {"error": "some message", "details": "some details"}\n\n'
+    )
+
+
+def test_debug__overloaded__service_unavailable(client, mocker):
+
+    mocker.patch(
+        'app.service.main.RustService.debug',
+        side_effect=OverloadedException()
+    )
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(config.RETRY_AFTER)
+    assert response.json['error'] == messages.MSG_11
+
+
+def test_metrics__ok(client, mocker, tmp_path):
+
+    mocker.patch('app.config.METRICS_DIR', str(tmp_path))
+    mocker.patch(
+        'app.service.main.RustService.debug',
+        return_value=DebugData(result='some result')
+    )
+    client.post('/debug/', json={'code': 'some code'})
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.data.decode()
+    assert '# TYPE sandbox_stage_duration_seconds histogram' in body
+    assert 'sandbox_request_duration_seconds_count{endpoint="/debug/"}' in body
+
+
+def test_debug__stats__usage_included(client, mocker):
+
+    debug_mock = mocker.patch(
+        'app.service.main.RustService.debug',
+        return_value=DebugData(result='1', wall_time=0.5, cpu_time=0.25, max_rss=2048)
+    )
+
+    response = client.post('/debug/', json={'code': 'some code', 'stats': True})
+
+    assert response.status_code == 200
+    assert response.json == {
+        'result': '1',
+        'error': None,
+        'wall_time': 0.5,
+        'cpu_time': 0.25,
+        'max_rss': 2048
+    }
+    debug_mock.assert_called_once_with(DebugData(code='some code', stats=True))
+
+
+def test_debug__no_stats__usage_omitted(client, mocker):
+
+    mocker.patch(
+        'app.service.main.RustService.debug',
+        return_value=DebugData(result='1')
+    )
+
+    response = client.post('/debug/', json={'code': 'some code'})
+
+    assert response.json == {'result': '1', 'error': None}
+
+
+def test_testing__stats__totals(client, mocker):
+
+    request_data = {
+        'code': 'some code',
+        'checker': 'some func',
+        'stats': True,
+        'tests': [
+            {'data_in': 'in 1', 'data_out': 'out 1'},
+            {'data_in': 'in 2', 'data_out': 'out 2'}
+        ]
+    }
+    mocker.patch(
+        'app.service.main.RustService.testing',
+        return_value=TestsData(tests=[
+            TestData(ok=True, wall_time=0.5, cpu_time=0.25, max_rss=100),
+            TestData(ok=True, wall_time=1.0, cpu_time=0.5, max_rss=300)
+        ])
+    )
+
+    response = client.post('/testing/', json=request_data)
+
+    assert response.json['wall_time'] == 1.5
+    assert response.json['cpu_time'] == 0.75
+    assert response.json['max_rss'] == 300
+    assert response.json['tests'][1]['max_rss'] == 300
+
+
+def test_debug__limits__ok(client, mocker):
+
+    debug_mock = mocker.patch(
+        'app.service.main.RustService.debug',
+        return_value=DebugData(result='1')
+    )
+    request_data = {
+        'code': 'some code',
+        'limits': {'timeout': 2, 'cpu_timeout': 1}
+    }
+
+    response = client.post('/debug/', json=request_data)
+
+    assert response.status_code == 200
+    debug_mock.assert_called_once_with(
+        DebugData(code='some code', limits=Limits(timeout=2, cpu_timeout=1))
+    )
+
+
+def test_testing__limits_above_maximum__bad_request(client, mocker):
+
+    mocker.patch('app.config.MAX_REQUEST_TIMEOUT', 30)
+    service_mock = mocker.patch('app.service.main.RustService.testing')
+    request_data = {
+        'code': 'some code',
+        'comparator': 'exact',
+        'tests': [{'data_in': '1', 'data_out': '1'}],
+        'limits': {'request_timeout': 31}
+    }
+
+    response = client.post('/testing/', json=request_data)
+
+    assert response.status_code == 400
+    assert response.json['details'] == {
+        'limits': {'request_timeout': ['Must be less than or equal to 30.']}
+    }
+    service_mock.assert_not_called()
+
+
+def test_check__ok(client, mocker):
+
+    check_result = CheckData(
+        ok=False,
+        error=messages.MSG_RUST_COMPILE_ERROR,
+        details='error[E0308]: mismatched types'
+    )
+    check_mock = mocker.patch(
+        'app.service.main.RustService.check',
+        return_value=check_result
+    )
+
+    response = client.post('/check/', json={'code': 'some code'})
+
+    assert response.status_code == 200
+    assert response.json == {
+        'ok': False,
+        'error': messages.MSG_RUST_COMPILE_ERROR,
+        'details': 'error[E0308]: mismatched types'
+    }
+    check_mock.assert_called_once_with(CheckData(code='some code'))
+
+
+def test_check__validation_error__bad_request(client, mocker):
+
+    check_mock = mocker.patch('app.service.main.RustService.check')
+
+    response = client.post('/check/', json={})
+
+    assert response.status_code == 400
+    assert response.json['details'] == {
+        'code': ['Missing data for required field.']
+    }
+    check_mock.assert_not_called()
+
+
+def test_debug__check_only__ok(client, mocker):
+
+    debug_mock = mocker.patch(
+        'app.service.main.RustService.debug',
+        return_value=DebugData()
+    )
+
+    response = client.post('/debug/', json={'code': 'some code', 'check_only': True})
+
+    assert response.status_code == 200
+    debug_mock.assert_called_once_with(DebugData(code='some code', check_only=True))
+
+
+def test_debug__unknown_profile__bad_request(client, mocker):
+
+    debug_mock = mocker.patch('app.service.main.RustService.debug')
+
+    response = client.post('/debug/', json={'code': 'some code', 'profile': 'turbo'})
+
+    assert response.status_code == 400
+    assert list(response.json['details']) == ['profile']
+    debug_mock.assert_not_called()
+
+
+def test_health_live__ok(client):
+
+    response = client.get('/health/live')
+
+    assert response.status_code == 200
+    assert response.json['status'] == 'ok'
+
+
+def test_health_ready__warming__service_unavailable(client, mocker):
+
+    warm_up = mocker.patch('app.main.warm_up')
+    warm_up.ready = False
+    warm_up.status.return_value = {'status': 'warming', 'error': None}
+
+    response = client.get('/health/ready')
+
+    assert response.status_code == 503
+    assert response.json['status'] == 'warming'
+
+
+def test_health_ready__warmed_up__ok(client, mocker):
+
+    warm_up = mocker.patch('app.main.warm_up')
+    warm_up.ready = True
+    warm_up.status.return_value = {'status': 'ready', 'error': None}
+
+    response = client.get('/health/ready')
+
+    assert response.status_code == 200
+    assert response.json['status'] == 'ready'
@@ -0,0 +1,205 @@
+import json
+import asyncio
+
+import pytest
+
+from app import config, messages
+from app.asgi import app, start_server
+from app.entities import CheckData, DebugData, TestData, TestsData
+from app.service.exceptions import ServiceException, OverloadedException
+
+
+def call(method: str, path: str, payload=None, body: bytes = None):
+    if body is None:
+        body = b'' if payload is None else json.dumps(payload).encode()
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': []}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, response = sent
+    headers = dict(start['headers'])
+    if headers[b'content-type'] == b'application/json':
+        return start['status'], headers, json.loads(response['body'])
+    return start['status'], headers, response['body'].decode()
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(mocker, tmp_path):
+    mocker.patch('app.config.METRICS_DIR', str(tmp_path))
+
+
+def test_debug__ok(mocker):
+
+    debug_mock = mocker.patch(
+        'app.service.aio.AsyncRustService.debug',
+        return_value=DebugData(result='some result', error=None)
+    )
+
+    status, _, payload = call('POST', '/debug/', {'code': 'some code', 'data_in': 'some input'})
+
+    assert status == 200
+    assert payload == {'result': 'some result', 'error': None}
+    debug_mock.assert_awaited_once_with(DebugData(code='some code', data_in='some input'))
+
+
+def test_check__ok(mocker):
+
+    mocker.patch(
+        'app.service.aio.AsyncRustService.check',
+        return_value=CheckData(ok=True)
+    )
+
+    status, _, payload = call('POST', '/check/', {'code': 'some code'})
+
+    assert status == 200
+    assert payload['ok'] is True
+
+
+def test_testing__ok(mocker):
+
+    tests_result = TestsData(
+        tests=[TestData(data_in='1', data_out='2', result='2', ok=True)]
+    )
+    mocker.patch(
+        'app.service.aio.AsyncRustService.testing',
+        return_value=tests_result
+    )
+
+    status, _, payload = call('POST', '/testing/', {
+        'code': 'some code',
+        'checker': 'some checker',
+        'tests': [{'data_in': '1', 'data_out': '2'}],
+    })
+
+    assert status == 200
+    assert payload['ok'] is True
+    assert payload['tests'][0]['result'] == '2'
+
+
+def test_debug__validation_error__bad_request():
+
+    status, _, payload = call('POST', '/debug/', {})
+
+    assert status == 400
+    assert payload['error'] == 'Validation error'
+    assert 'code' in payload['details']
+
+
+def test_debug__invalid_json__bad_request():
+
+    status, _, payload = call('POST', '/debug/', body=b'{bad')
+
+    assert status == 400
+    assert payload['error'] == 'Bad Request'
+
+
+def test_debug__service_exception__internal_error(mocker):
+
+    mocker.patch(
+        'app.service.aio.AsyncRustService.debug',
+        side_effect=ServiceException(message='some message', details='some details')
+    )
+
+    status, _, payload = call('POST', '/debug/', {'code': 'some code'})
+
+    assert status == 500
+    assert payload == {'error': 'some message', 'details': 'some details'}
+
+
+def test_debug__overloaded__service_unavailable(mocker):
+
+    mocker.patch(
+        'app.service.aio.AsyncRustService.debug',
+        side_effect=OverloadedException()
+    )
+
+    status, headers, payload = call('POST', '/debug/', {'code': 'some code'})
+
+    assert status == 503
+    assert headers[b'retry-after'] == str(config.RETRY_AFTER).encode()
+    assert payload['error'] == messages.MSG_11
+
+
+def test_unknown_route__not_found():
+
+    status, _, _ = call('POST', '/jobs/')
+
+    assert status == 404
+
+
+def test_debug__get__method_not_allowed():
+
+    status, _, _ = call('GET', '/debug/')
+
+    assert status == 405
+
+
+def test_health_ready__warming__service_unavailable(mocker):
+
+    warm_up = mocker.patch('app.asgi.warm_up')
+    warm_up.ready = False
+    warm_up.status.return_value = {'status': 'failed', 'error': 'some error'}
+
+    status, _, payload = call('GET', '/health/ready')
+
+    assert status == 503
+    assert payload == {'status': 'failed', 'error': 'some error'}
+
+
+def test_metrics__ok(mocker):
+
+    mocker.patch(
+        'app.service.aio.AsyncRustService.debug',
+        return_value=DebugData(result='some result')
+    )
+    call('POST', '/debug/', {'code': 'some code'})
+
+    status, _, text = call('GET', '/metrics')
+
+    assert status == 200
+    assert 'sandbox_request_duration_seconds_count{endpoint="/debug/"}' in text
+
+
+def test_serve__keep_alive__two_responses(mocker):
+
+    mocker.patch(
+        'app.service.aio.AsyncRustService.debug',
+        return_value=DebugData(result='some result')
+    )
+    body = json.dumps({'code': 'some code'}).encode()
+    request = (
+        b'POST /debug/ HTTP/1.1\r\nHost: localhost\r\n'
+        b'Content-Type: application/json\r\n'
+        b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+    )
+
+    async def run():
+        server = await start_server(app, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for _ in range(2):
+            writer.write(request)
+            status_line = await reader.readline()
+            headers = {}
+            while (line := await reader.readline()).strip():
+                name, _, value = line.decode().partition(':')
+                headers[name.strip()] = value.strip()
+            responses.append(
+                (status_line, await reader.readexactly(int(headers['content-length'])))
+            )
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    responses = asyncio.run(run())
+
+    assert [status for status, _ in responses] == [b'HTTP/1.1 200 OK\r\n'] * 2
+    assert json.loads(responses[1][1])['result'] == 'some result'
@@ -0,0 +1,47 @@
+from app import gunicorn_conf
+
+
+def test_size__one_core__threads_cover_admitted(mocker):
+
+    mocker.patch('app.config.GUNICORN_WORKERS', 0)
+    mocker.patch('app.config.GUNICORN_THREADS', 0)
+
+    workers, threads = gunicorn_conf.size(cpu_count=1, concurrency=7)
+
+    assert workers == 2
+    assert workers * threads >= 7
+
+
+def test_size__many_cores__workers_capped_by_concurrency(mocker):
+
+    mocker.patch('app.config.GUNICORN_WORKERS', 0)
+    mocker.patch('app.config.GUNICORN_THREADS', 0)
+
+    workers, threads = gunicorn_conf.size(cpu_count=64, concurrency=10)
+
+    assert (workers, threads) == (10, 1)
+
+
+def test_size__env_override__used(mocker):
+
+    mocker.patch('app.config.GUNICORN_WORKERS', 3)
+    mocker.patch('app.config.GUNICORN_THREADS', 8)
+
+    assert gunicorn_conf.size(cpu_count=1, concurrency=7) == (3, 8)
+
+
+def test_admitted_requests__slots_and_queue(mocker):
+
+    mocker.patch('app.config.COMPILE_SLOTS', 2)
+    mocker.patch('app.config.SCHEDULER_QUEUE_SIZE', 8)
+
+    assert gunicorn_conf.admitted_requests() == 10
+
+
+def test_request_budget__covers_longest_request(mocker):
+
+    mocker.patch('app.config.SCHEDULER_WAIT_TIMEOUT', 60)
+    mocker.patch('app.config.COMPILE_TIMEOUT', 10)
+    mocker.patch('app.config.MAX_REQUEST_TIMEOUT', 120)
+
+    assert gunicorn_conf.request_budget() > 60 + 10 + 120
@@ -0,0 +1,53 @@
+import os
+import json
+
+import pytest
+
+from app.metrics import Registry, Counter, Histogram
+
+
+@pytest.fixture()
+def registry(tmp_path, mocker):
+    mocker.patch('app.config.METRICS_DIR', str(tmp_path))
+    mocker.patch('app.config.METRICS_FLUSH_INTERVAL', 0)
+    return Registry()
+
+
+def test_collect__counter_and_histogram__exposition(registry):
+
+    counter = Counter('test_total', 'Test counter', registry=registry)
+    histogram = Histogram('test_seconds', 'Test histogram', buckets=(0.1, 1), registry=registry)
+
+    counter.inc()
+    counter.inc(2, stage='compile')
+    histogram.observe(0.05, stage='compile')
+    histogram.observe(0.5, stage='compile')
+
+    lines = registry.collect().splitlines()
+
+    assert '# TYPE test_total counter' in lines
+    assert 'test_total 1' in lines
+    assert 'test_total{stage="compile"} 2' in lines
+    assert '# TYPE test_seconds histogram' in lines
+    assert 'test_seconds_bucket{stage="compile",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="compile",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="compile",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{stage="compile"} 2' in lines
+
+
+def test_collect__other_processes__aggregated(registry, tmp_path):
+
+    counter = Counter('test_total', 'Test counter', registry=registry)
+    counter.inc()
+    alive_pid, dead_pid = os.getppid(), 2 ** 22 + 1
+    for pid in (alive_pid, dead_pid):
+        with open(tmp_path / f'{pid}.json', 'w') as file:
+            json.dump({'test_total': {'': 10}}, file)
+
+    first = registry.collect()
+    second = registry.collect()
+
+    assert 'test_total 21' in first.splitlines()
+    assert 'test_total 21' in second.splitlines()
+    assert not (tmp_path / f'{dead_pid}.json').exists()
+    assert (tmp_path / 'archive.json').exists()
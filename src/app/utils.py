@@ -8,6 +8,12 @@ def clean_str(value: Optional[str]) -> Optional[str]:
     return value
 
 
+def clean_paths(value: Optional[str], root: str) -> Optional[str]:
+    if isinstance(value, str):
+        return value.replace(root.rstrip("/") + "/", "")
+    return value
+
+
 def clean_error(value: Optional[str]) -> Optional[str]:
     if not isinstance(value, str):
         return value
@@ -0,0 +1,82 @@
+"""Compile and run latency of the build backends and profiles.
+
+Usage (from src/): python -m benchmarks.compile [-n 10] [--backend rustc] [--profile fast-run]
+"""
+import argparse
+import statistics
+import time
+from unittest import mock
+
+from app import config
+from app.service.backends import BACKENDS
+from app.service.entities import RustFile
+from app.service.main import RustService
+from app.service.profiles import PROFILES
+
+
+PROGRAM = """
+use std::io;
+fn main() {
+    let mut input = String::new();
+    io::stdin().read_line(&mut input).unwrap();
+    let n: u64 = input.trim().parse().unwrap_or(10);
+    let v: Vec<u64> = (0..n).map(|x| x * x).collect();
+    println!("{}", v.iter().sum::<u64>());
+}
+"""
+DATA_IN = "3000000"
+
+
+def measure(backend: str, profile: str, runs: int):
+    compile_timings, run_timings = [], []
+    with mock.patch.object(config, 'COMPILE_BACKEND', backend):
+        for _ in range(runs):
+            file = RustFile(PROGRAM, profile=profile)
+            start = time.perf_counter()
+            err = RustService._compile(file)
+            compile_timings.append(time.perf_counter() - start)
+            if err:
+                file.remove()
+                raise SystemExit(f'{backend}/{profile}: compile failed\n{err}')
+            start = time.perf_counter()
+            RustService._execute(file=file, data_in=DATA_IN)
+            run_timings.append(time.perf_counter() - start)
+            file.remove()
+    return compile_timings, run_timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=10)
+    parser.add_argument(
+        '--backend',
+        action='append',
+        choices=sorted(BACKENDS),
+        help='backend to measure, may be repeated (default: all)'
+    )
+    parser.add_argument(
+        '--profile',
+        action='append',
+        choices=sorted(PROFILES),
+        help='build profile to measure, may be repeated (default: all)'
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'backend':<8} {'profile':<13} {'runs':>5} "
+        f"{'compile p50, ms':>16} {'run p50, ms':>12} {'total p50, ms':>14}"
+    )
+    for backend in args.backend or sorted(BACKENDS):
+        for profile in args.profile or sorted(PROFILES):
+            compile_timings, run_timings = measure(backend, profile, args.runs)
+            totals = [c + r for c, r in zip(compile_timings, run_timings)]
+            print(
+                f"{backend:<8} {profile:<13} {len(totals):>5} "
+                f"{statistics.median(compile_timings) * 1000:>16.1f} "
+                f"{statistics.median(run_timings) * 1000:>12.1f} "
+                f"{statistics.median(totals) * 1000:>14.1f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
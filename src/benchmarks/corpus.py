@@ -0,0 +1,119 @@
+"""Representative submissions used by the load benchmark."""
+
+HELLO_WORLD = """
+fn main() {
+    println!("Hello, world!");
+}
+"""
+
+HEAVY_GENERICS = """
+use std::collections::{BTreeMap, HashMap};
+use std::fmt::Debug;
+use std::ops::Add;
+
+trait Shape: Debug {
+    fn area(&self) -> f64;
+}
+
+#[derive(Debug, Clone, Copy)]
+struct Square<T>(T);
+
+#[derive(Debug, Clone, Copy)]
+struct Rect<T>(T, T);
+
+impl<T: Into<f64> + Copy + Debug> Shape for Square<T> {
+    fn area(&self) -> f64 { self.0.into() * self.0.into() }
+}
+
+impl<T: Into<f64> + Copy + Debug> Shape for Rect<T> {
+    fn area(&self) -> f64 { self.0.into() * self.1.into() }
+}
+
+fn total<T: Add<Output = T> + Default + Copy>(items: &[T]) -> T {
+    items.iter().fold(T::default(), |acc, &x| acc + x)
+}
+
+fn group<K: Ord + Clone, V: Clone>(pairs: &[(K, V)]) -> BTreeMap<K, Vec<V>> {
+    let mut map = BTreeMap::new();
+    for (k, v) in pairs {
+        map.entry(k.clone()).or_insert_with(Vec::new).push(v.clone());
+    }
+    map
+}
+
+fn main() {
+    let shapes: Vec<Box<dyn Shape>> = vec![
+        Box::new(Square(2u8)),
+        Box::new(Square(3.5f32)),
+        Box::new(Rect(2u16, 4u16)),
+        Box::new(Rect(1.5f64, 2.0f64)),
+    ];
+    let areas: Vec<f64> = shapes.iter().map(|s| s.area()).collect();
+    let mut counts: HashMap<String, usize> = HashMap::new();
+    for s in &shapes {
+        *counts.entry(format!("{:?}", s).split('(').next().unwrap().to_string()).or_default() += 1;
+    }
+    let grouped = group(&[(1, "a"), (2, "b"), (1, "c")]);
+    println!("{:.2} {} {:?} {}", total(&areas), total(&[1i64, 2, 3]), grouped, counts.len());
+}
+"""
+
+COMPILE_ERROR = """
+fn main() {
+    let x: i32 = "not a number";
+    println!("{}", x);
+}
+"""
+
+PANIC = """
+fn main() {
+    let v: Vec<i32> = Vec::new();
+    println!("{}", v[10]);
+}
+"""
+
+INFINITE_LOOP = """
+fn main() {
+    loop {}
+}
+"""
+
+BIG_OUTPUT = """
+fn main() {
+    for i in 0..200000 {
+        println!("line {}", i);
+    }
+}
+"""
+
+SUM = """
+use std::io::Read;
+fn main() {
+    let mut buf = String::new();
+    std::io::stdin().read_to_string(&mut buf).unwrap();
+    let sum: i64 = buf.split_whitespace().map(|x| x.parse::<i64>().unwrap()).sum();
+    println!("{}", sum);
+}
+"""
+
+CHECKER = (
+    "def checker(right_value: str, value: str) -> bool:\n"
+    "    return right_value == value\n"
+)
+
+CASES = {
+    'hello-world': ('/debug/', {'code': HELLO_WORLD}),
+    'heavy-generics': ('/debug/', {'code': HEAVY_GENERICS}),
+    'compile-error': ('/debug/', {'code': COMPILE_ERROR}),
+    'panic': ('/debug/', {'code': PANIC}),
+    'infinite-loop': ('/debug/', {'code': INFINITE_LOOP}),
+    'big-output': ('/debug/', {'code': BIG_OUTPUT}),
+    'tests-100': ('/testing/', {
+        'code': SUM,
+        'checker': CHECKER,
+        'tests': [
+            {'data_in': f'{i} {i + 1}', 'data_out': str(2 * i + 1)}
+            for i in range(100)
+        ],
+    }),
+}
@@ -0,0 +1,203 @@
+"""End-to-end load benchmark for /debug/ and /testing/.
+
+Usage (from src/, against a running service):
+    python -m benchmarks.load --url http://localhost:9009 -c 4 -n 20
+    python -m benchmarks.load --save baseline.json
+    python -m benchmarks.load --baseline baseline.json --threshold 0.1
+
+Every corpus case is sent -n times with -c concurrent clients. The report
+has client-side req/s and p50/p95/p99 latency per case and, when the
+service exposes /metrics, server-side p50/p95/p99 per stage estimated
+from the histogram buckets collected during the run.
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import CASES
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+BUCKET_RE = re.compile(
+    r'^sandbox_stage_duration_seconds_bucket\{stage="([^"]+)",le="([^"]+)"\} (\S+)$'
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+def post(url: str, payload: dict, timeout: float) -> bool:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def unique(payload: dict) -> dict:
+    # A fresh comment defeats the artifact cache to measure cold compiles
+    return {**payload, 'code': f"// {uuid.uuid4()}\n{payload['code']}"}
+
+
+def run_case(args, name: str) -> dict:
+    endpoint, payload = CASES[name]
+    url = args.url.rstrip('/') + endpoint
+
+    def send(_):
+        body = unique(payload) if args.cold else payload
+        start = time.perf_counter()
+        ok = post(url, body, timeout=args.timeout)
+        return ok, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency in results]
+    report = {
+        'requests': len(results),
+        'errors': sum(1 for ok, _ in results if not ok),
+        'rps': len(results) / elapsed,
+        'mean': statistics.mean(latencies),
+    }
+    for q in QUANTILES:
+        report[f'p{int(q * 100)}'] = percentile(latencies, q)
+    return report
+
+
+def scrape_stages(url: str) -> Optional[Dict[str, Dict[float, float]]]:
+    try:
+        with urllib.request.urlopen(url.rstrip('/') + '/metrics', timeout=10) as response:
+            body = response.read().decode()
+    except (urllib.error.URLError, OSError):
+        return None
+    stages: Dict[str, Dict[float, float]] = defaultdict(dict)
+    for line in body.splitlines():
+        match = BUCKET_RE.match(line)
+        if match:
+            stage, bound, count = match.groups()
+            stages[stage][float(bound)] = float(count)
+    return stages
+
+
+def stage_quantiles(before, after) -> Dict[str, dict]:
+    report = {}
+    for stage, buckets in after.items():
+        previous = before.get(stage, {})
+        bounds = sorted(buckets)
+        counts = [buckets[b] - previous.get(b, 0) for b in bounds]
+        total = counts[-1] if counts else 0
+        if not total:
+            continue
+        stats = {'count': int(total)}
+        for q in QUANTILES:
+            rank, lower, lower_count = q * total, 0.0, 0.0
+            for bound, count in zip(bounds, counts):
+                if count >= rank:
+                    if bound == float('inf'):
+                        value = lower
+                    else:
+                        width = count - lower_count
+                        value = lower + (bound - lower) * ((rank - lower_count) / width if width else 0)
+                    break
+                lower, lower_count = bound, count
+            stats[f'p{int(q * 100)}'] = value
+        report[stage] = stats
+    return report
+
+
+def print_table(title: str, rows: Dict[str, dict], columns: List[str]):
+    print(f"\n{title}")
+    print(f"{'':<16}" + ''.join(f"{column:>10}" for column in columns))
+    for name, row in rows.items():
+        cells = []
+        for column in columns:
+            value = row.get(column, 0)
+            cells.append(f"{value:>10.3f}" if isinstance(value, float) else f"{value:>10}")
+        print(f"{name:<16}" + ''.join(cells))
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, case in result['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if not base:
+            continue
+        if case['rps'] < base['rps'] * (1 - threshold):
+            regressions.append(f"{name}: rps {base['rps']:.2f} -> {case['rps']:.2f}")
+        for q in ('p50', 'p95', 'p99'):
+            if case[q] > base[q] * (1 + threshold):
+                regressions.append(f"{name}: {q} {base[q]:.3f}s -> {case[q]:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n'.join(__doc__.splitlines()[2:]),
+    )
+    parser.add_argument('--url', default='http://localhost:9009')
+    parser.add_argument('-c', '--concurrency', type=int, default=4)
+    parser.add_argument('-n', '--requests', type=int, default=20, help='requests per case')
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='case to run, may be repeated (default: all)')
+    parser.add_argument('--cold', action='store_true', help='make every submission unique to bypass compile caches')
+    parser.add_argument('--timeout', type=float, default=120, help='client timeout per request, seconds')
+    parser.add_argument('--save', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='compare with results saved by --save')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative regression')
+    args = parser.parse_args()
+
+    result = {
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'cold': args.cold,
+        'cases': {},
+    }
+    before = scrape_stages(args.url)
+    for name in args.case or CASES:
+        result['cases'][name] = run_case(args, name)
+    after = scrape_stages(args.url)
+    if before is not None and after is not None:
+        result['stages'] = stage_quantiles(before, after)
+
+    print_table('Cases (client side, seconds)', result['cases'], ['requests', 'errors', 'rps', 'p50', 'p95', 'p99'])
+    if result.get('stages'):
+        print_table('Stages (server side, seconds)', result['stages'], ['count', 'p50', 'p95', 'p99'])
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(result, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(result, json.load(file), args.threshold)
+        if regressions:
+            print('\nRegressions:\n  ' + '\n  '.join(regressions))
+            sys.exit(1)
+        print('\nNo regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
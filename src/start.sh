@@ -1,2 +1,2 @@
 #!/bin/bash
-gunicorn --bind 0:9002 app.main:app --reload -w ${GUNICORN_WORKERS:=1}
\ No newline at end of file
+gunicorn -c python:app.gunicorn_conf --bind 0:9002 app.main:app
\ No newline at end of file